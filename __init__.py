@@ -1,4 +1,4 @@
 from .src.board import *
 from .src.searcher_pvs import Searcher
-from .src.hueristic import evaluate
+from .src.hueristic import evaluate, evaluate_static
 from .src.utils import set_logger_level
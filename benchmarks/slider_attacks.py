@@ -0,0 +1,148 @@
+"""
+Microbenchmark of slider attack lookups: the dict tables keyed by occupancy
+in src.board against flat lists indexed by a multiply-shift of the occupancy
+(diagonals, files) or a plain shift (ranks).
+
+The flat lists were slower than the dicts on CPython 3.11 (~0.8x), so the
+engine keeps the dicts. They are kept here to be measured under PyPy, run
+from the repository root under each interpreter, e.g.
+
+    python -m benchmarks.slider_attacks
+    pypy -m benchmarks.slider_attacks
+"""
+import argparse
+import platform
+import random
+import timeit
+from typing import List, Tuple
+
+from src.board import (
+    BB_DIAG_ATTACKS,
+    BB_DIAG_MASKS,
+    BB_FILE_A,
+    BB_FILE_ATTACKS,
+    BB_FILE_H,
+    BB_FILE_MASKS,
+    BB_RANK_ATTACKS,
+    BB_RANK_MASKS,
+    BB_RANKS,
+    SQUARES,
+    Bitboard,
+    _carry_rippler,
+    _edges,
+    _sliding_attacks,
+    square_file,
+    square_rank,
+)
+
+# Flat lists hold one block of entries per square, indexed by the occupancy of
+# the inner squares of the lines through that square:
+#   diagonals  square << 9 | (occupied & BB_DIAG_MASKS[square]) * DIAG_MAGICS[square] >> 55 & 511
+#   files      square << 6 | (occupied & BB_FILE_MASKS[square]) * FILE_MAGICS[square] >> 58 & 63
+#   ranks      square << 6 | occupied >> (square & 56 | 1) & 63
+# The multiply gathers the scattered occupancy bits into the top bits of the
+# 64 bit product, which is a couple of int ops instead of hashing a bitboard.
+# fmt: off
+DIAG_MAGICS = [
+    0x00090B0200092120, 0x0410810102003400, 0x0008804420040040, 0x0004451190120008,
+    0x1006438088002081, 0x4006202006021080, 0x0602840B00418000, 0x2806001042240428,
+    0x0180200413001040, 0x000D600106008002, 0x400001002A120020, 0x0005098040400121,
+    0x0400040105000000, 0x0280CC1008010020, 0x08040008808120C0, 0x4800005505207007,
+    0x0202008088180090, 0x62808080500106C0, 0x02C040D000423020, 0x32821100C0130260,
+    0x2004040014040400, 0x400810088070C000, 0x01082006801000A2, 0x0000810802060370,
+    0x4440400024040080, 0x4040802791420804, 0x0603480025148045, 0x049080200A020200,
+    0xE401010010904000, 0x0285020801006005, 0x40180A0020603000, 0x8088208030122842,
+    0x0080111010408442, 0xC20402024C005000, 0x060244101081C020, 0x4003420080080080,
+    0x2800488020020200, 0x04080020A0044010, 0x00082A1012004800, 0x0208828081000A01,
+    0x124A002148480288, 0x2001500808010420, 0x0200061811400101, 0x0110021009008420,
+    0x04000881202006A0, 0x6020040040800802, 0x821200B10200004B, 0x00070008800A8080,
+    0x01A0900820014010, 0x000101C418208000, 0x4400010008C418C8, 0x000000008A020308,
+    0x0010000188221040, 0x0000080901100842, 0x0050408010860001, 0x2241001100188040,
+    0x0304440820504401, 0x00040E0108510400, 0x00008002108088A8, 0x4820009C08022020,
+    0x0208201004002441, 0x0000082300820010, 0x181081A040C14100, 0x0242200224040802,
+]
+# fmt: on
+FILE_MAGICS = [0x0080402010080400 >> square_file(sq) for sq in SQUARES]
+
+
+def _flat_attack_table(deltas: List[int], bits: int, magics: List[int]) -> List[Bitboard]:
+    attack_table = [0] * (64 << bits)
+    shift = 64 - bits
+    index_mask = (1 << bits) - 1
+
+    for square in SQUARES:
+        # rank lookups shift the whole inner rank down, square included
+        if magics:
+            occupancies = _sliding_attacks(square, 0, deltas) & ~_edges(square)
+        else:
+            occupancies = BB_RANKS[square_rank(square)] & ~(BB_FILE_A | BB_FILE_H)
+
+        for subset in _carry_rippler(occupancies):
+            if magics:
+                index = square << bits | subset * magics[square] >> shift & index_mask
+            else:
+                index = square << bits | subset >> (square & 56 | 1) & index_mask
+            attacks = _sliding_attacks(square, subset, deltas)
+            assert not attack_table[index] or attack_table[index] == attacks
+            attack_table[index] = attacks
+
+    return attack_table
+
+
+FLAT_DIAG_ATTACKS = _flat_attack_table([-9, -7, 7, 9], 9, DIAG_MAGICS)
+FLAT_FILE_ATTACKS = _flat_attack_table([-8, 8], 6, FILE_MAGICS)
+FLAT_RANK_ATTACKS = _flat_attack_table([-1, 1], 6, [])
+
+
+def _positions(n: int, seed: int) -> List[Tuple[int, Bitboard]]:
+    rng = random.Random(seed)
+    # and-ing random words gives ~16 pieces, roughly a middlegame board
+    return [(rng.randrange(64), rng.getrandbits(64) & rng.getrandbits(64)) for _ in range(n)]
+
+
+def dict_queen_attacks(positions: List[Tuple[int, Bitboard]]) -> Bitboard:
+    acc = 0
+    for square, occupied in positions:
+        acc ^= (
+            BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
+            | BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]
+            | BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]
+        )
+    return acc
+
+
+def flat_queen_attacks(positions: List[Tuple[int, Bitboard]]) -> Bitboard:
+    acc = 0
+    for square, occupied in positions:
+        acc ^= (
+            FLAT_DIAG_ATTACKS[square << 9 | (occupied & BB_DIAG_MASKS[square]) * DIAG_MAGICS[square] >> 55 & 511]
+            | FLAT_RANK_ATTACKS[square << 6 | occupied >> (square & 56 | 1) & 63]
+            | FLAT_FILE_ATTACKS[square << 6 | (occupied & BB_FILE_MASKS[square]) * FILE_MAGICS[square] >> 58 & 63]
+        )
+    return acc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--positions', type=int, default=10_000)
+    parser.add_argument('--number', type=int, default=100, help='passes over the positions per timing')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    positions = _positions(args.positions, args.seed)
+    assert dict_queen_attacks(positions) == flat_queen_attacks(positions)
+
+    lookups = args.positions * args.number
+    print(f'{platform.python_implementation()} {platform.python_version()}, {lookups} queen lookups per run')
+    results = {}
+    for name, fn in [('dict', dict_queen_attacks), ('flat', flat_queen_attacks)]:
+        # first run doubles as JIT warmup under PyPy
+        best = min(timeit.repeat(lambda: fn(positions), number=args.number, repeat=args.repeat))
+        results[name] = best
+        print(f'{name:>5}: {best / lookups * 1e9:8.1f} ns/lookup')
+    print(f'speedup: {results["dict"] / results["flat"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Fixed depth search over a built-in set of positions, for comparing the speed
+of the engine between commits and interpreters. The node total is a
+signature of the search: it only changes when the search itself does.
+
+    python uci.py bench [depth]
+
+or ``bench [depth]`` from a UCI session.
+"""
+from time import time
+from typing import Tuple
+
+from .board import Board
+from .hueristic import eval_cache, pawn_table
+from .material import material_table
+from .searcher_pvs import Searcher
+
+BENCH_DEPTH = 4
+
+# tests/data/search_test_data.json, then the start of tests/data/wac_200.epd
+BENCH_FENS = [
+    'r6r/1b2k1bq/8/8/7B/8/8/R3K2R b KQ - 3 2',
+    '8/8/8/2k5/2pP4/8/B7/4K3 b - d3 0 3',
+    'r1bqkbnr/pppppppp/n7/8/8/P7/1PPPPPPP/RNBQKBNR w KQkq - 2 2',
+    'r3k2r/p1pp1pb1/bn2Qnp1/2qPN3/1p2P3/2N5/PPPBBPPP/R3K2R b KQkq - 3 2',
+    '2kr3r/p1ppqpb1/bn2Qnp1/3PN3/1p2P3/2N5/PPPBBPPP/R3K2R b KQ - 3 2',
+    'rnb2k1r/pp1Pbppp/2p5/q7/2B5/8/PPPQNnPP/RNB1K2R w KQ - 3 9',
+    '2r5/3pk3/8/2P5/8/2K5/8/8 w - - 5 4',
+    'r2qk2r/pb4pp/1n2Pb2/2B2Q2/p1p5/2P5/2B2PPP/RN2R1K1 w - - 1 0',
+    'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+    'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+    'r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1',
+    'r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1',
+    '8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1',
+    '8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1',
+    '3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1',
+    '8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1',
+    '8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1',
+    '5k2/8/8/8/8/8/8/4K2R w K - 0 1',
+    '3k4/8/8/8/8/8/8/R3K3 w Q - 0 1',
+    '2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1',
+    '4k3/1P6/8/8/8/8/K7/8 w - - 0 1',
+    '8/P1k5/K7/8/8/8/8/8 w - - 0 1',
+    'K1k5/8/P7/8/8/8/8/8 w - - 0 1',
+    '8/k1P5/8/1K6/8/8/8/8 w - - 0 1',
+    '5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1',
+    'r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1',
+    '5k2/6pp/p1qN4/1p1p4/3P4/2PKP2Q/PP3r2/3R4 b - - 0 1',
+    '7k/p7/1R5K/6r1/6p1/6P1/8/8 w - - 0 1',
+    'rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1',
+    'r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1',
+    '2br2k1/2q3rn/p2NppQ1/2p1P3/Pp5R/4P3/1P3PPP/3R2K1 w - - 0 1',
+    'r1b1kb1r/3q1ppp/pBp1pn2/8/Np3P2/5B2/PPP3PP/R2Q1RK1 w kq - 0 1',
+    '4k1r1/2p3r1/1pR1p3/3pP2p/3P2qP/P4N2/1PQ4P/5R1K b - - 0 1',
+    '5rk1/pp4p1/2n1p2p/2Npq3/2p5/6P1/P3P1BP/R4Q1K w - - 0 1',
+    'r2rb1k1/pp1q1p1p/2n1p1p1/2bp4/5P2/PP1BPR1Q/1BPN2PP/R5K1 w - - 0 1',
+    'r4rk1/ppp2ppp/2n5/2bqp3/8/P2PB3/1PP1NPPP/R2Q1RK1 w - - 0 1',
+    '1k5r/pppbn1pp/4q1r1/1P3p2/2NPp3/1QP5/P4PPP/R1B1R1K1 w - - 0 1',
+    'R7/P4k2/8/8/8/8/r7/6K1 w - - 0 1',
+    'r1b2rk1/ppbn1ppp/4p3/1QP4q/3P4/N4N2/5PPP/R1B2RK1 w - - 0 1',
+    'r2qkb1r/1ppb1ppp/p7/4p3/P1Q1P3/2P5/5PPP/R1B2KNR b kq - 0 1',
+]
+
+
+def bench(depth: int = BENCH_DEPTH, verbose: bool = True) -> Tuple[int, float]:
+    """
+    Searches every bench position to *depth* with a new searcher and empty
+    eval, pawn and material tables, and returns the total nodes (search and
+    quiescence) and the time spent searching in seconds. Setting up each
+    position is not timed.
+    """
+    total_nodes = 0
+    elapsed = 0.0
+    for i, fen in enumerate(BENCH_FENS, 1):
+        eval_cache.clear()
+        pawn_table.clear()
+        material_table.clear()
+        searcher = Searcher()
+        board = Board(fen)
+
+        start = time()
+        for _ in searcher._search_at_depth(board, depth):
+            pass
+        elapsed += time() - start
+
+        nodes = searcher.nodes + searcher.qnodes
+        total_nodes += nodes
+        if verbose:
+            print(f'position {i}/{len(BENCH_FENS)} nodes {nodes}', flush=True)
+
+    if verbose:
+        print(f'Total time (ms) : {round(1000 * elapsed)}')
+        print(f'Nodes searched  : {total_nodes}')
+        print(f'Nodes/second    : {round(total_nodes / elapsed)}', flush=True)
+    return total_nodes, elapsed
@@ -45,6 +45,8 @@ except ImportError:
     # Before Python 3.8.
     _EnPassantSpec = str  # type: ignore
 
+from .piece_square_tables import EG_PIECE_SQUARE, MG_PIECE_SQUARE
+
 
 Color = bool
 COLORS = [WHITE, BLACK] = [True, False]
@@ -55,6 +57,15 @@ PIECE_TYPES = [PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING] = range(1, 7)
 PIECE_SYMBOLS = [None, "p", "n", "b", "r", "q", "k"]
 PIECE_NAMES = [None, "pawn", "knight", "bishop", "rook", "queen", "king"]
 
+def piece_code(piece_type: PieceType, color: Color) -> int:
+    # mailbox byte of a piece: type in the low 3 bits, color in bit 3
+    return piece_type | color << 3
+
+
+def material_count(material_key: int, piece_type: PieceType, color: Color) -> int:
+    # the material key holds a 4 bit count per piece code
+    return material_key >> (piece_code(piece_type, color) << 2) & 0xF
+
 def piece_symbol(piece_type: PieceType) -> str:
     return typing.cast(str, PIECE_SYMBOLS[piece_type])
 
@@ -80,6 +91,9 @@ STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 STARTING_BOARD_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
 """The board part of the FEN for the standard chess starting position."""
 
+MAX_PLY = 256
+"""Initial depth of the :func:`~chess.Board.make_move()` undo stack, it grows past this if needed."""
+
 """Helpful Enums"""
 class MoveType(enum.Enum):
     CAPTURE = 1
@@ -296,6 +310,16 @@ POLYGLOT_RANDOM_ARRAY = [
     0xF8D626AAAF278509
 ]
 
+# Zobrist keys of a piece on a square, indexed [color][piece_type][square],
+# taken from the polyglot array the same way Board.__hash__ does.
+POLYGLOT_PIECE_KEYS = [
+    [[0] * 64] + [
+        [POLYGLOT_RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + color) + square] for square in range(64)]
+        for piece_type in range(1, 7)
+    ]
+    for color in range(2)
+]
+
 class Status(enum.IntFlag):
     VALID = 0
     NO_WHITE_KING = 1 << 0
@@ -641,39 +665,36 @@ BB_DIAG_MASKS, BB_DIAG_ATTACKS = _attack_table([-9, -7, 7, 9])
 BB_FILE_MASKS, BB_FILE_ATTACKS = _attack_table([-8, 8])
 BB_RANK_MASKS, BB_RANK_ATTACKS = _attack_table([-1, 1])
 
-def _attack_table_edges(deltas: List[int]) -> Tuple[List[Bitboard], List[Dict[Bitboard, Bitboard]]]:
-    mask_table = []
-    attack_table = []
+# Slider attacks on an empty board
+BB_DIAG_RAYS = [attacks[0] for attacks in BB_DIAG_ATTACKS]
+BB_FILE_RAYS = [attacks[0] for attacks in BB_FILE_ATTACKS]
+BB_RANK_RAYS = [attacks[0] for attacks in BB_RANK_ATTACKS]
 
-    for square in SQUARES:
-        attacks = {}
+def diag_attacks(square: Square, occupied: Bitboard) -> Bitboard:
+    return BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
 
-        # mask = _sliding_attacks(square, 0, deltas) & ~_edges(square)
-        mask = _sliding_attacks(square, 0, deltas)
+def file_attacks(square: Square, occupied: Bitboard) -> Bitboard:
+    return BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied]
 
-        for subset in _carry_rippler(mask):
-            attacks[subset] = _sliding_attacks(square, subset, deltas)
+def rank_attacks(square: Square, occupied: Bitboard) -> Bitboard:
+    return BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied]
 
-        attack_table.append(attacks)
-        mask_table.append(mask)
-
-    return mask_table, attack_table
-
-BB_DIAG_MASKS_E, BB_DIAG_ATTACKS_E = _attack_table_edges([-9, -7, 7, 9])
-BB_FILE_MASKS_E, BB_FILE_ATTACKS_E = _attack_table_edges([-8, 8])
-BB_RANK_MASKS_E, BB_RANK_ATTACKS_E = _attack_table_edges([-1, 1])
+# Slider attacks with every square on the lines occupied, i.e. a single step
+BB_DIAG_ATTACKS_E = [_step_attacks(sq, [-9, -7, 7, 9]) for sq in SQUARES]
+BB_FILE_ATTACKS_E = [_step_attacks(sq, [-8, 8]) for sq in SQUARES]
+BB_RANK_ATTACKS_E = [_step_attacks(sq, [-1, 1]) for sq in SQUARES]
 
 def _rays() -> List[List[Bitboard]]:
     rays = []
     for a, bb_a in enumerate(BB_SQUARES):
         rays_row = []
         for b, bb_b in enumerate(BB_SQUARES):
-            if BB_DIAG_ATTACKS[a][0] & bb_b:
-                rays_row.append((BB_DIAG_ATTACKS[a][0] & BB_DIAG_ATTACKS[b][0]) | bb_a | bb_b)
-            elif BB_RANK_ATTACKS[a][0] & bb_b:
-                rays_row.append(BB_RANK_ATTACKS[a][0] | bb_a)
-            elif BB_FILE_ATTACKS[a][0] & bb_b:
-                rays_row.append(BB_FILE_ATTACKS[a][0] | bb_a)
+            if BB_DIAG_RAYS[a] & bb_b:
+                rays_row.append((BB_DIAG_RAYS[a] & BB_DIAG_RAYS[b]) | bb_a | bb_b)
+            elif BB_RANK_RAYS[a] & bb_b:
+                rays_row.append(BB_RANK_RAYS[a] | bb_a)
+            elif BB_FILE_RAYS[a] & bb_b:
+                rays_row.append(BB_FILE_RAYS[a] | bb_a)
             else:
                 rays_row.append(BB_EMPTY)
         rays.append(rays_row)
@@ -689,6 +710,50 @@ def between(a: Square, b: Square) -> Bitboard:
     return bb & (bb - 1)
 
 
+# Cuckoo tables of the reversible piece moves (no pawns) for upcoming
+# repetition detection, keyed by the Zobrist difference the move makes:
+# the piece leaving one square, landing on the other, and the side to move.
+# Each key sits in one of two slots, cuckoo_slot_1 or cuckoo_slot_2 of it.
+# See Board.has_game_cycle.
+CUCKOO_SIZE = 8192
+
+def cuckoo_slot_1(key: int) -> int:
+    return key & (CUCKOO_SIZE - 1)
+
+def cuckoo_slot_2(key: int) -> int:
+    return key >> 16 & (CUCKOO_SIZE - 1)
+
+def _cuckoo_tables() -> Tuple[List[int], List[int]]:
+    keys = [0] * CUCKOO_SIZE
+    moves = [0] * CUCKOO_SIZE
+    for color in COLORS:
+        for piece_type in [KNIGHT, BISHOP, ROOK, QUEEN, KING]:
+            piece_keys = POLYGLOT_PIECE_KEYS[color][piece_type]
+            for a in SQUARES:
+                if piece_type == KNIGHT:
+                    targets = BB_KNIGHT_ATTACKS[a]
+                elif piece_type == BISHOP:
+                    targets = BB_DIAG_RAYS[a]
+                elif piece_type == ROOK:
+                    targets = BB_RANK_RAYS[a] | BB_FILE_RAYS[a]
+                elif piece_type == QUEEN:
+                    targets = BB_DIAG_RAYS[a] | BB_RANK_RAYS[a] | BB_FILE_RAYS[a]
+                else:
+                    targets = BB_KING_ATTACKS[a]
+                for b in scan_forward(targets & ~(BB_SQUARES[a] * 2 - 1)):
+                    key = piece_keys[a] ^ piece_keys[b] ^ POLYGLOT_RANDOM_ARRAY[780]
+                    move = a | b << 6
+                    slot = cuckoo_slot_1(key)
+                    # kick out whatever is there to its other slot until one is free
+                    while move:
+                        keys[slot], key = key, keys[slot]
+                        moves[slot], move = move, moves[slot]
+                        slot = cuckoo_slot_2(key) if slot == cuckoo_slot_1(key) else cuckoo_slot_1(key)
+    return keys, moves
+
+CUCKOO_KEYS, CUCKOO_MOVES = _cuckoo_tables()
+
+
 SAN_REGEX = re.compile(r"^([NBKRQ])?([a-h])?([1-8])?[\-x]?([a-h][1-8])(=?[nbrqkNBRQK])?[\+#]?\Z")
 
 FEN_CASTLING_REGEX = re.compile(r"^(?:-|[KQABCDEFGH]{0,2}[kqabcdefgh]{0,2})\Z")
@@ -839,6 +904,68 @@ class Move:
         return cls(0, 0)
 
 
+# Compact int moves used by the engine (search, TT, move generation):
+#   bits  0-5   from square
+#   bits  6-11  to square
+#   bits 12-13  promotion piece type - KNIGHT
+#   bits 14-15  flags
+# The null move is 0, which also tests ``False``.
+IntMove = int
+
+MOVE_NULL = 0
+MOVE_NORMAL = 0
+MOVE_PROMOTION = 1 << 14
+MOVE_EN_PASSANT = 2 << 14
+MOVE_CASTLING = 3 << 14
+MOVE_FLAGS = 3 << 14
+MOVE_SQUARES = 0xFFF
+"""Mask of the from and to square bits, e.g. to index history tables."""
+
+# promotion bits in the order the generators yield them
+PROMOTIONS = [MOVE_PROMOTION | (piece_type - KNIGHT) << 12 for piece_type in [QUEEN, ROOK, BISHOP, KNIGHT]]
+
+SEE_VALUES = [0, 100, 300, 300, 500, 900, 0]
+"""Piece values for :func:`~chess.Board.see()`, indexed by piece type."""
+
+QUEEN_PROMOTION = MOVE_PROMOTION | (QUEEN - KNIGHT) << 12
+
+
+def mvv_lva(victim: int, attacker: int) -> int:
+    # most valuable victim first, then least valuable attacker
+    return victim << 3 | KING - attacker
+
+
+def pack_move(from_square: Square, to_square: Square, promotion: Optional[PieceType] = None, flags: int = MOVE_NORMAL) -> IntMove:
+    if promotion:
+        return from_square | to_square << 6 | MOVE_PROMOTION | (promotion - KNIGHT) << 12
+    return from_square | to_square << 6 | flags
+
+
+def move_from_square(move: IntMove) -> Square:
+    return move & 0x3F
+
+
+def move_to_square(move: IntMove) -> Square:
+    return move >> 6 & 0x3F
+
+
+def move_promotion(move: IntMove) -> Optional[PieceType]:
+    if move & MOVE_FLAGS == MOVE_PROMOTION:
+        return (move >> 12 & 0x3) + KNIGHT
+    return None
+
+
+def unpack_move(move: IntMove) -> Move:
+    """Converts an int move to a :class:`~chess.Move` in standard chess notation."""
+    if not move:
+        return Move.null()
+    return Move(move & 0x3F, move >> 6 & 0x3F, move_promotion(move))
+
+
+def move_uci(move: IntMove) -> str:
+    return unpack_move(move).uci()
+
+
 BaseBoardT = TypeVar("BaseBoardT", bound="BaseBoard")
 
 class BaseBoard:
@@ -853,6 +980,8 @@ class BaseBoard:
 
     def __init__(self, board_fen: Optional[str] = STARTING_BOARD_FEN) -> None:
         self.occupied_co = [BB_EMPTY, BB_EMPTY]
+        # piece code of each square (see piece_code), 0 when empty
+        self.mailbox = bytearray(64)
 
         if board_fen is None:
             self._clear_board()
@@ -875,6 +1004,8 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_RANK_7 | BB_RANK_8
         self.occupied = BB_RANK_1 | BB_RANK_2 | BB_RANK_7 | BB_RANK_8
 
+        self._recompute_incremental()
+
     def reset_board(self) -> None:
         """
         Resets pieces to the starting position.
@@ -899,6 +1030,13 @@ class BaseBoard:
         self.occupied_co[BLACK] = BB_EMPTY
         self.occupied = BB_EMPTY
 
+        self.mailbox = bytearray(64)
+        self.zobrist = 0
+        self.pawn_key = 0
+        self.material_key = 0
+        self.mg_score = 0
+        self.eg_score = 0
+
     def clear_board(self) -> None:
         """
         Clears the board.
@@ -935,42 +1073,20 @@ class BaseBoard:
 
     def piece_at(self, square: Square) -> Optional[Piece]:
         """Gets the :class:`piece <chess.Piece>` at the given square."""
-        piece_type = self.piece_type_at(square)
-        if piece_type:
-            mask = BB_SQUARES[square]
-            color = bool(self.occupied_co[WHITE] & mask)
-            return Piece(piece_type, color)
+        code = self.mailbox[square]
+        if code:
+            return Piece(code & 7, bool(code >> 3))
         else:
             return None
 
     def piece_type_at(self, square: Square) -> Optional[PieceType]:
         """Gets the piece type at the given square."""
-        mask = BB_SQUARES[square]
-
-        if not self.occupied & mask:
-            return None  # Early return
-        elif self.pawns & mask:
-            return PAWN
-        elif self.knights & mask:
-            return KNIGHT
-        elif self.bishops & mask:
-            return BISHOP
-        elif self.rooks & mask:
-            return ROOK
-        elif self.queens & mask:
-            return QUEEN
-        else:
-            return KING
+        return self.mailbox[square] & 7 or None
 
     def color_at(self, square: Square) -> Optional[Color]:
         """Gets the color of the piece at the given square."""
-        mask = BB_SQUARES[square]
-        if self.occupied_co[WHITE] & mask:
-            return WHITE
-        elif self.occupied_co[BLACK] & mask:
-            return BLACK
-        else:
-            return None
+        code = self.mailbox[square]
+        return bool(code >> 3) if code else None
 
     def king(self, color: Color) -> Optional[Square]:
         """
@@ -995,11 +1111,12 @@ class BaseBoard:
             return BB_KING_ATTACKS[square]
         else:
             attacks = 0
+            occupied = self.occupied
             if bb_square & self.bishops or bb_square & self.queens:
-                attacks = BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & self.occupied]
+                attacks = BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
             if bb_square & self.rooks or bb_square & self.queens:
-                attacks |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & self.occupied] |
-                            BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & self.occupied])
+                attacks |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] |
+                            BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied])
             return attacks
 
     def attacks(self, square: Square) -> SquareSet:
@@ -1041,10 +1158,9 @@ class BaseBoard:
         else:
             attacks = 0
             if bb_square & self.bishops or bb_square & self.queens:
-                attacks = BB_DIAG_ATTACKS_E[square][BB_DIAG_MASKS_E[square]]
+                attacks = BB_DIAG_ATTACKS_E[square]
             if bb_square & self.rooks or bb_square & self.queens:
-                attacks |= (BB_RANK_ATTACKS_E[square][BB_RANK_MASKS_E[square]] |
-                            BB_FILE_ATTACKS_E[square][BB_FILE_MASKS_E[square]])
+                attacks |= BB_RANK_ATTACKS_E[square] | BB_FILE_ATTACKS_E[square]
             return attacks
 
     def _attackers_mask(self, color: Color, square: Square, occupied: Bitboard) -> Bitboard:
@@ -1093,10 +1209,10 @@ class BaseBoard:
 
         square_mask = BB_SQUARES[square]
 
-        for attacks, sliders in [(BB_FILE_ATTACKS, self.rooks | self.queens),
-                                 (BB_RANK_ATTACKS, self.rooks | self.queens),
-                                 (BB_DIAG_ATTACKS, self.bishops | self.queens)]:
-            rays = attacks[king][0]
+        for attacks, sliders in [(BB_FILE_RAYS, self.rooks | self.queens),
+                                 (BB_RANK_RAYS, self.rooks | self.queens),
+                                 (BB_DIAG_RAYS, self.bishops | self.queens)]:
+            rays = attacks[king]
             if rays & square_mask:
                 snipers = rays & sliders & self.occupied_co[not color]
                 for sniper in scan_reversed(snipers):
@@ -1142,12 +1258,44 @@ class BaseBoard:
         """
         return self.pin_mask(color, square) != BB_ALL
 
+    def _zobrist_pieces(self) -> int:
+        z_board = 0
+        for color, squares in enumerate(self.occupied_co):
+            for square in scan_reversed(squares):
+                z_board ^= POLYGLOT_PIECE_KEYS[color][typing.cast(PieceType, self.piece_type_at(square))][square]
+        return z_board
+
+    def _recompute_incremental(self) -> None:
+        # Rebuilds everything _set_piece_at/_remove_piece_at keep up to date,
+        # for code that assigns the bitboards directly.
+        self.mailbox = bytearray(64)
+        self.material_key = 0
+        for color in COLORS:
+            for piece_type in PIECE_TYPES:
+                for square in scan_reversed(self.pieces_mask(piece_type, color)):
+                    self.mailbox[square] = piece_code(piece_type, color)
+                    self.material_key += 1 << (piece_code(piece_type, color) << 2)
+        self.zobrist = self._zobrist_pieces()
+        self.pawn_key = 0
+        for color in COLORS:
+            for square in scan_reversed(self.pieces_mask(PAWN, color)):
+                self.pawn_key ^= POLYGLOT_PIECE_KEYS[color][PAWN][square]
+        self.mg_score = 0
+        self.eg_score = 0
+        for color, squares in enumerate(self.occupied_co):
+            for square in scan_reversed(squares):
+                piece_type = typing.cast(PieceType, self.piece_type_at(square))
+                self.mg_score += MG_PIECE_SQUARE[color][piece_type][square]
+                self.eg_score += EG_PIECE_SQUARE[color][piece_type][square]
+
     def _remove_piece_at(self, square: Square) -> Optional[PieceType]:
-        piece_type = self.piece_type_at(square)
+        code = self.mailbox[square]
+        piece_type = code & 7
         mask = BB_SQUARES[square]
 
         if piece_type == PAWN:
             self.pawns ^= mask
+            self.pawn_key ^= POLYGLOT_PIECE_KEYS[code >> 3][PAWN][square]
         elif piece_type == KNIGHT:
             self.knights ^= mask
         elif piece_type == BISHOP:
@@ -1161,6 +1309,13 @@ class BaseBoard:
         else:
             return None
 
+        color = code >> 3
+        self.mailbox[square] = 0
+        self.material_key -= 1 << (code << 2)
+        self.zobrist ^= POLYGLOT_PIECE_KEYS[color][piece_type][square]
+        self.mg_score -= MG_PIECE_SQUARE[color][piece_type][square]
+        self.eg_score -= EG_PIECE_SQUARE[color][piece_type][square]
+
         self.occupied ^= mask
         self.occupied_co[WHITE] &= ~mask
         self.occupied_co[BLACK] &= ~mask
@@ -1187,6 +1342,7 @@ class BaseBoard:
 
         if piece_type == PAWN:
             self.pawns |= mask
+            self.pawn_key ^= POLYGLOT_PIECE_KEYS[color][PAWN][square]
         elif piece_type == KNIGHT:
             self.knights |= mask
         elif piece_type == BISHOP:
@@ -1200,6 +1356,13 @@ class BaseBoard:
         else:
             return
 
+        code = piece_type | color << 3
+        self.mailbox[square] = code
+        self.material_key += 1 << (code << 2)
+        self.zobrist ^= POLYGLOT_PIECE_KEYS[color][piece_type][square]
+        self.mg_score += MG_PIECE_SQUARE[color][piece_type][square]
+        self.eg_score += EG_PIECE_SQUARE[color][piece_type][square]
+
         self.occupied ^= mask
         self.occupied_co[color] ^= mask
 
@@ -1400,6 +1563,8 @@ class BaseBoard:
         self.occupied = BB_RANK_1 | BB_RANK_2 | BB_RANK_7 | BB_RANK_8
         self.promoted = BB_EMPTY
 
+        self._recompute_incremental()
+
     def set_chess960_pos(self, scharnagl: int) -> None:
         """
         Sets up a Chess960 starting position given its index between 0 and 959.
@@ -1586,6 +1751,8 @@ class BaseBoard:
         self.occupied = f(self.occupied)
         self.promoted = f(self.promoted)
 
+        self._recompute_incremental()
+
     def transform(self: BaseBoardT, f: Callable[[Bitboard], Bitboard]) -> BaseBoardT:
         """
         Returns a transformed copy of the board (without move stack)
@@ -1607,6 +1774,7 @@ class BaseBoard:
     def apply_mirror(self: BaseBoardT) -> None:
         self.apply_transform(flip_vertical)
         self.occupied_co[WHITE], self.occupied_co[BLACK] = self.occupied_co[BLACK], self.occupied_co[WHITE]
+        self._recompute_incremental()
 
     def mirror(self: BaseBoardT) -> BaseBoardT:
         """
@@ -1638,6 +1806,13 @@ class BaseBoard:
         board.occupied = self.occupied
         board.promoted = self.promoted
 
+        board.mailbox = self.mailbox[:]
+        board.zobrist = self.zobrist
+        board.pawn_key = self.pawn_key
+        board.material_key = self.material_key
+        board.mg_score = self.mg_score
+        board.eg_score = self.eg_score
+
         return board
 
     def __copy__(self: BaseBoardT) -> BaseBoardT:
@@ -1674,24 +1849,6 @@ class BaseBoard:
 BoardT = TypeVar("BoardT", bound="Board")
 
 
-# for repetition detection
-from dataclasses import dataclass
-@dataclass(frozen=True, eq=True)
-class _BoardPiecesState():
-        pawns: int
-        knights: int
-        bishops: int
-        rooks: int
-        queens: int
-        kings: int
-        occ_w: int
-        occ_b: int
-        occ: int
-        prom: Bitboard
-        turn: Color
-        ep_square: Optional[Square] = None
-
-
 class _BoardState(Generic[BoardT]):
 
     def __init__(self, board: BoardT) -> None:
@@ -1707,6 +1864,7 @@ class _BoardState(Generic[BoardT]):
         self.occupied = board.occupied
 
         self.promoted = board.promoted
+        self.mailbox = bytes(board.mailbox)
 
         self.turn = board.turn
         self.castling_rights = board.castling_rights
@@ -1714,6 +1872,12 @@ class _BoardState(Generic[BoardT]):
         self.halfmove_clock = board.halfmove_clock
         self.fullmove_number = board.fullmove_number
 
+        self.zobrist = board.zobrist
+        self.pawn_key = board.pawn_key
+        self.material_key = board.material_key
+        self.mg_score = board.mg_score
+        self.eg_score = board.eg_score
+
     def restore(self, board: BoardT) -> None:
         board.pawns = self.pawns
         board.knights = self.knights
@@ -1727,6 +1891,7 @@ class _BoardState(Generic[BoardT]):
         board.occupied = self.occupied
 
         board.promoted = self.promoted
+        board.mailbox[:] = self.mailbox
 
         board.turn = self.turn
         board.castling_rights = self.castling_rights
@@ -1734,6 +1899,219 @@ class _BoardState(Generic[BoardT]):
         board.halfmove_clock = self.halfmove_clock
         board.fullmove_number = self.fullmove_number
 
+        board.zobrist = self.zobrist
+        board.pawn_key = self.pawn_key
+        board.material_key = self.material_key
+        board.mg_score = self.mg_score
+        board.eg_score = self.eg_score
+
+
+class AttackInfo:
+    """
+    Attack information of a position, shared by the search, the move
+    generators and the evaluation. Get it from
+    :func:`~chess.Board.attack_info()`, which builds it at most once per node.
+
+    Checkers and pinned pieces of the side to move and the king zones are
+    worked out up front, the attack bitboards the first time they are asked for.
+    """
+
+    __slots__ = ["board", "key", "turn", "king", "checkers", "pinned", "king_zones", "_attacks", "_king_danger", "_check_info"]
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.key = board.zobrist
+        self.turn = turn = board.turn
+        self._attacks: List[Optional[List[Bitboard]]] = [None, None]
+        self._king_danger: Optional[Bitboard] = None
+        self._check_info: Optional[CheckInfo] = None
+
+        # king square plus the squares around it, indexed by color
+        self.king_zones = [BB_EMPTY, BB_EMPTY]
+        for color in COLORS:
+            king_mask = board.kings & board.occupied_co[color]
+            if king_mask:
+                square = msb(king_mask)
+                self.king_zones[color] = BB_KING_ATTACKS[square] | BB_SQUARES[square]
+
+        king_mask = board.kings & board.occupied_co[turn]
+        if king_mask:
+            self.king = msb(king_mask)
+            self.checkers = board.attackers_mask(not turn, self.king)
+            self.pinned = board._slider_blockers(self.king)
+        else:
+            self.king = None
+            self.checkers = BB_EMPTY
+            self.pinned = BB_EMPTY
+
+    def attacks(self, color: Color) -> List[Bitboard]:
+        """
+        Squares attacked by *color*, indexed by piece type. Index 0 holds
+        the union over all piece types.
+        """
+        attacks = self._attacks[color]
+        if attacks is None:
+            attacks = self._attacks[color] = self._compute_attacks(color)
+        return attacks
+
+    def _compute_attacks(self, color: Color) -> List[Bitboard]:
+        board = self.board
+        ours = board.occupied_co[color]
+        occupied = board.occupied
+        attacks = [BB_EMPTY] * 7
+
+        pawns = board.pawns & ours
+        if color == WHITE:
+            attacks[PAWN] = shift_up_left(pawns) | shift_up_right(pawns)
+        else:
+            attacks[PAWN] = shift_down_left(pawns) | shift_down_right(pawns)
+
+        for square in scan_reversed(board.knights & ours):
+            attacks[KNIGHT] |= BB_KNIGHT_ATTACKS[square]
+        for square in scan_reversed(board.bishops & ours):
+            attacks[BISHOP] |= BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied]
+        for square in scan_reversed(board.rooks & ours):
+            attacks[ROOK] |= (BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] |
+                              BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied])
+        for square in scan_reversed(board.queens & ours):
+            attacks[QUEEN] |= (BB_DIAG_ATTACKS[square][BB_DIAG_MASKS[square] & occupied] |
+                               BB_RANK_ATTACKS[square][BB_RANK_MASKS[square] & occupied] |
+                               BB_FILE_ATTACKS[square][BB_FILE_MASKS[square] & occupied])
+        for square in scan_reversed(board.kings & ours):
+            attacks[KING] |= BB_KING_ATTACKS[square]
+
+        attacks[0] = attacks[PAWN] | attacks[KNIGHT] | attacks[BISHOP] | attacks[ROOK] | attacks[QUEEN] | attacks[KING]
+        return attacks
+
+    def king_danger(self) -> Bitboard:
+        """
+        Squares next to the king of the side to move that it can't step to:
+        enemy attacks, plus the squares behind it on the line of a checking
+        slider.
+        """
+        if self._king_danger is None:
+            king = self.king
+            if king is None:
+                self._king_danger = BB_EMPTY
+            else:
+                board = self.board
+                danger = self.attacks(not self.turn)[0]
+                for checker in scan_reversed(self.checkers & (board.bishops | board.rooks | board.queens)):
+                    danger |= ray(king, checker) & ~BB_SQUARES[checker]
+                self._king_danger = danger & BB_KING_ATTACKS[king]
+        return self._king_danger
+
+    def check_mask(self) -> Bitboard:
+        """
+        Squares a piece other than the king has to move to: anywhere when not
+        in check, capturing or blocking a single checker, nowhere in double check.
+        """
+        checkers = self.checkers
+        if not checkers:
+            return BB_ALL
+        checker = msb(checkers)
+        if BB_SQUARES[checker] != checkers:
+            return BB_EMPTY
+        return between(self.king, checker) | checkers
+
+    def check_info(self) -> CheckInfo:
+        """The :class:`~chess.CheckInfo` of the side to move, built on first use."""
+        if self._check_info is None:
+            self._check_info = CheckInfo(self.board)
+        return self._check_info
+
+
+class CheckInfo:
+    """
+    What it takes for the side to move to check the enemy king: the squares
+    each piece type gives check from, and our pieces that uncover a check by
+    moving off the line between one of our sliders and the king. Built once
+    per node by :func:`~chess.AttackInfo.check_info()`, after which
+    :func:`~chess.CheckInfo.gives_check()` is a few lookups per move.
+    """
+
+    __slots__ = ["board", "king", "check_squares", "discoverers"]
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.check_squares = [BB_EMPTY] * 7
+        self.discoverers = BB_EMPTY
+
+        turn = board.turn
+        king_mask = board.kings & board.occupied_co[not turn]
+        if not king_mask:
+            self.king = None
+            return
+        king = self.king = msb(king_mask)
+
+        occupied = board.occupied
+        diag = diag_attacks(king, occupied)
+        rank_file = rank_attacks(king, occupied) | file_attacks(king, occupied)
+        self.check_squares[PAWN] = BB_PAWN_ATTACKS[not turn][king]
+        self.check_squares[KNIGHT] = BB_KNIGHT_ATTACKS[king]
+        self.check_squares[BISHOP] = diag
+        self.check_squares[ROOK] = rank_file
+        self.check_squares[QUEEN] = diag | rank_file
+
+        # our sliders lined up with the king behind exactly one of our pieces
+        ours = board.occupied_co[turn]
+        snipers = (((BB_RANK_RAYS[king] | BB_FILE_RAYS[king]) & (board.rooks | board.queens)) |
+                   (BB_DIAG_RAYS[king] & (board.bishops | board.queens)))
+        for sniper in scan_reversed(snipers & ours):
+            b = between(king, sniper) & occupied
+            if b and BB_SQUARES[msb(b)] == b and b & ours:
+                self.discoverers |= b
+
+    def gives_check(self, move: IntMove) -> bool:
+        """Tests if a pseudo-legal int move of the side to move gives check."""
+        king = self.king
+        if king is None:
+            return False
+        board = self.board
+        from_square = move & 0x3F
+        to_square = move >> 6 & 0x3F
+        flags = move & MOVE_FLAGS
+
+        # discovered check, the piece leaves the line to the king
+        if self.discoverers & BB_SQUARES[from_square] and not BB_RAYS[king][from_square] & BB_SQUARES[to_square]:
+            return True
+
+        if flags == MOVE_NORMAL:
+            return bool(self.check_squares[board.piece_type_at(from_square)] & BB_SQUARES[to_square])
+
+        if flags == MOVE_PROMOTION:
+            piece_type = (move >> 12 & 0x3) + KNIGHT
+            if piece_type == KNIGHT:
+                return bool(self.check_squares[KNIGHT] & BB_SQUARES[to_square])
+            # the pawn may have stood on the line it now checks along
+            occupied = board.occupied & ~BB_SQUARES[from_square]
+            attacks = BB_EMPTY
+            if piece_type != ROOK:
+                attacks |= diag_attacks(king, occupied)
+            if piece_type != BISHOP:
+                attacks |= rank_attacks(king, occupied) | file_attacks(king, occupied)
+            return bool(attacks & BB_SQUARES[to_square])
+
+        if flags == MOVE_EN_PASSANT:
+            if self.check_squares[PAWN] & BB_SQUARES[to_square]:
+                return True
+            # taking the pawn can open a line as well
+            captured = to_square - 8 if board.turn == WHITE else to_square + 8
+            occupied = board.occupied & ~BB_SQUARES[from_square] & ~BB_SQUARES[captured] | BB_SQUARES[to_square]
+            ours = board.occupied_co[board.turn]
+            return bool(
+                diag_attacks(king, occupied) & (board.bishops | board.queens) & ours or
+                (rank_attacks(king, occupied) | file_attacks(king, occupied)) & (board.rooks | board.queens) & ours)
+
+        # castling, the rook is the one that can check
+        if to_square > from_square:
+            rook_from, rook_to = to_square + 1, to_square - 1
+        else:
+            rook_from, rook_to = to_square - 2, to_square + 1
+        occupied = board.occupied ^ BB_SQUARES[from_square] ^ BB_SQUARES[to_square] ^ BB_SQUARES[rook_from] ^ BB_SQUARES[rook_to]
+        return bool((rank_attacks(king, occupied) | file_attacks(king, occupied)) & BB_SQUARES[rook_to])
+
+
 class Board(BaseBoard):
     """
     A :class:`~chess.BaseBoard`, additional information representing
@@ -1756,7 +2134,9 @@ class Board(BaseBoard):
 
     It's safe to set :data:`~Board.turn`, :data:`~Board.castling_rights`,
     :data:`~Board.ep_square`, :data:`~Board.halfmove_clock` and
-    :data:`~Board.fullmove_number` directly.
+    :data:`~Board.fullmove_number` directly. After changing the first three,
+    call :func:`~chess.Board.clear_stack()` to bring :data:`~Board.zobrist`
+    back in sync.
 
     .. warning::
         It is possible to set up and work with invalid positions. In this
@@ -1829,6 +2209,36 @@ class Board(BaseBoard):
     promoted: Bitboard
     """A bitmask of pieces that have been promoted."""
 
+    zobrist: int
+    """
+    The Zobrist key of the position, as returned by ``hash(board)``. Updated
+    incrementally by :func:`~chess.Board.push()` and restored by
+    :func:`~chess.Board.pop()`.
+    """
+
+    pawn_key: int
+    """
+    The Zobrist key of the pawns of both colors alone, for the pawn hash
+    table. Maintained along with :data:`~Board.zobrist`.
+    """
+
+    material_key: int
+    """
+    The count of each piece type of each color, 4 bits per
+    :func:`~chess.piece_code`, keying the material table. Maintained along
+    with :data:`~Board.zobrist`.
+    """
+
+    mg_score: int
+    """
+    Running middle game piece-square sum, from white's point of view.
+    Material is looked up by :data:`~Board.material_key`. Maintained along
+    with :data:`~Board.zobrist`.
+    """
+
+    eg_score: int
+    """The end game counterpart of :data:`~Board.mg_score`."""
+
     chess960: bool
     """
     Whether the board is in Chess960 mode. In Chess960 castling moves are
@@ -1853,6 +2263,17 @@ class Board(BaseBoard):
         self.move_stack = []
         self._stack: List[_BoardState[BoardT]] = []
 
+        # undo stack for make_move/unmake_move, one slot per ply
+        self._undo_ply = 0
+        self._undo_move: List[IntMove] = [MOVE_NULL] * MAX_PLY
+        self._undo_captured: List[PieceType] = [0] * MAX_PLY
+        self._undo_castling: List[Bitboard] = [BB_EMPTY] * MAX_PLY
+        self._undo_ep: List[Optional[Square]] = [None] * MAX_PLY
+        self._undo_halfmove: List[int] = [0] * MAX_PLY
+        self._undo_zobrist: List[int] = [0] * MAX_PLY
+        # attack info of the node at each ply, see attack_info()
+        self._attack_infos: List[Optional[AttackInfo]] = [None] * (MAX_PLY + 1)
+
         if fen is None:
             self.clear()
         elif fen == type(self).starting_fen:
@@ -1935,6 +2356,8 @@ class Board(BaseBoard):
         """Clears the move stack."""
         self.move_stack.clear()
         self._stack.clear()
+        self._undo_ply = 0
+        self.zobrist = self._zobrist_hash()
 
     def root(self: BoardT) -> BoardT:
         """Returns a copy of the root position."""
@@ -2112,22 +2535,22 @@ class Board(BaseBoard):
         else:
             yield from self.generate_pseudo_legal_moves(from_mask, to_mask)
 
-    def get_legal_generator(self, gen, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move]:
+    def get_legal_generator(self, gen, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[IntMove, MoveType]:
         if self.is_variant_end():
             return
 
-        king_mask = self.kings & self.occupied_co[self.turn]
-        if king_mask:
-            king = msb(king_mask)
-            blockers = self._slider_blockers(king)
-            checkers = self.attackers_mask(not self.turn, king)
+        info = self.attack_info()
+        king = info.king
+        if king is not None:
+            blockers = info.pinned
+            checkers = info.checkers
             if checkers:
-                for move in self._generate_evasions(king, checkers, from_mask, to_mask):
-                    if self._is_safe(king, blockers, move):
+                for move in self._generate_int_evasions(king, checkers, from_mask, to_mask):
+                    if self._is_safe_int(king, blockers, move):
                         yield move, MoveType.OO_CHECK
             else:
                 for move, move_type in gen:
-                    if self._is_safe(king, blockers, move):
+                    if self._is_safe_int(king, blockers, move):
                         yield move, move_type
         else:
             for move, move_type in gen:
@@ -2180,7 +2603,7 @@ class Board(BaseBoard):
                     self._attacked_for_king(king_to, self.occupied ^ king ^ rook ^ rook_to)):
                 yield self._from_chess960(self.chess960, msb(king), candidate)
 
-    def _generate_evasions_with_type(self, king: Square, checkers: Bitboard, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move]:
+    def _generate_int_evasions(self, king: Square, checkers: Bitboard, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[IntMove]:
         sliders = checkers & (self.bishops | self.rooks | self.queens)
 
         attacked = 0
@@ -2189,136 +2612,212 @@ class Board(BaseBoard):
 
         if BB_SQUARES[king] & from_mask:
             for to_square in scan_reversed(BB_KING_ATTACKS[king] & ~self.occupied_co[self.turn] & ~attacked & to_mask):
-                yield Move(king, to_square), MoveType.CAPTURE
+                yield king | to_square << 6
 
         checker = msb(checkers)
         if BB_SQUARES[checker] == checkers:
             # Capture or block a single checker.
             target = between(king, checker) | checkers
 
-            yield from self.generate_sorted_pseudo_legal_moves(~self.kings & from_mask, target & to_mask)
+            for move, _ in self.generate_sorted_pseudo_legal_moves(None, None, ~self.kings & from_mask, target & to_mask):
+                yield move
 
             # Capture the checking pawn en passant (but avoid yielding
             # duplicate moves).
             if self.ep_square and not BB_SQUARES[self.ep_square] & target:
                 last_double = self.ep_square + (-8 if self.turn == WHITE else 8)
                 if last_double == checker:
-                    yield from self.generate_pseudo_legal_ep(from_mask, to_mask)
+                    yield from self._generate_int_ep(from_mask, to_mask)
 
-    def generate_sorted_non_qs_moves(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move, MoveType]:
-        king_mask = self.kings & self.occupied_co[self.turn]
-        if king_mask:
-            king = msb(king_mask)
-            blockers = self._slider_blockers(king)
-            checkers = self.attackers_mask(not self.turn, king)
-            if checkers:
-                for move in self._generate_evasions(king, checkers):
-                    if self._is_safe(king, blockers, move):
-                        yield move, MoveType.OTHER # TODO what to do here?
+    def _generate_int_ep(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[IntMove]:
+        if not self.ep_square or not BB_SQUARES[self.ep_square] & to_mask:
+            return
+
+        if BB_SQUARES[self.ep_square] & self.occupied:
+            return
+
+        capturers = (
+            self.pawns & self.occupied_co[self.turn] & from_mask &
+            BB_PAWN_ATTACKS[not self.turn][self.ep_square] &
+            BB_RANKS[4 if self.turn else 3])
+
+        for capturer in scan_reversed(capturers):
+            yield capturer | self.ep_square << 6 | MOVE_EN_PASSANT
+
+    def _generate_int_castling(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[IntMove]:
+        # standard chess only, the king moves two squares
+        backrank = BB_RANK_1 if self.turn == WHITE else BB_RANK_8
+        king = self.occupied_co[self.turn] & self.kings & ~self.promoted & backrank & from_mask
+        king &= -king
+        if not king:
+            return
+
+        bb_c = BB_FILE_C & backrank
+        bb_d = BB_FILE_D & backrank
+        bb_f = BB_FILE_F & backrank
+        bb_g = BB_FILE_G & backrank
+
+        for candidate in scan_reversed(self.clean_castling_rights() & backrank & to_mask):
+            rook = BB_SQUARES[candidate]
+
+            a_side = rook < king
+            king_to = bb_c if a_side else bb_g
+            rook_to = bb_d if a_side else bb_f
+
+            king_path = between(msb(king), msb(king_to))
+            rook_path = between(candidate, msb(rook_to))
+
+            if not ((self.occupied ^ king ^ rook) & (king_path | rook_path | king_to | rook_to) or
+                    self._attacked_for_king(king_path | king, self.occupied ^ king) or
+                    self._attacked_for_king(king_to, self.occupied ^ king ^ rook ^ rook_to)):
+                yield msb(king) | msb(king_to) << 6 | MOVE_CASTLING
+
+    def _is_safe_int(self, king: Square, blockers: Bitboard, move: IntMove) -> bool:
+        from_square = move & 0x3F
+        to_square = move >> 6 & 0x3F
+        if from_square == king:
+            if move & MOVE_FLAGS == MOVE_CASTLING:
+                return True
             else:
-                for move, typ in self.generate_non_qs_moves(from_mask, to_mask):
-                    if self._is_safe(king, blockers, move):
-                        yield move, typ
+                return not self.is_attacked_by(not self.turn, to_square)
+        elif move & MOVE_FLAGS == MOVE_EN_PASSANT:
+            return bool(self.pin_mask(self.turn, from_square) & BB_SQUARES[to_square] and
+                        not self._ep_skewered(king, from_square))
         else:
-            yield from self.generate_non_qs_moves(from_mask, to_mask)
+            return bool(not blockers & BB_SQUARES[from_square] or
+                        ray(from_square, to_square) & BB_SQUARES[king])
 
-    # a bit more optimal than the python-chess version
-    # by avoiding utility functions for castle hashing
-    def generate_non_qs_moves(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move, MoveType]: 
-        our_pieces = self.occupied_co[self.turn]
-        enemy_pieces = self.occupied_co[not self.turn] & to_mask
+    def _is_legal_int_ep(self, king: Square, checkers: Bitboard, blockers: Bitboard, move: IntMove) -> bool:
+        # en passant can uncover the king along the rank, so it keeps a legality test
+        if checkers:
+            # only a single check by the pawn itself, or through the ep square
+            checker = msb(checkers)
+            if BB_SQUARES[checker] != checkers:
+                return False
+            last_double = self.ep_square + (-8 if self.turn == WHITE else 8)
+            if last_double != checker and not between(king, checker) & BB_SQUARES[self.ep_square]:
+                return False
+        return self._is_safe_int(king, blockers, move)
 
-        # pawn captures that are not pawns
-        pawns = self.pawns & our_pieces 
+    def generate_legal_int_moves(self, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[IntMove]:
+        """
+        Generates legal int moves without testing them one by one. The check
+        mask and pin rays are worked out once, pinned pieces only move along
+        their pin ray and the king only to squares off the enemy attack map.
+        """
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        king_mask = self.kings & our_pieces
+        if not king_mask:
+            for move, _ in self.generate_sorted_pseudo_legal_moves(None, None, from_mask, to_mask):
+                yield move
+            return
 
-        for from_square in scan_reversed(pawns):
-            pawn_att_mask = BB_PAWN_ATTACKS[self.turn][from_square]
+        info = self.attack_info()
+        king = info.king
+        checkers = info.checkers
+        pinned = info.pinned
+        target = ~our_pieces & to_mask
 
-            for piece_mask in [self.queens, self.rooks, self.bishops, self.knights]:
-                targets = pawn_att_mask & enemy_pieces & piece_mask
+        if king_mask & from_mask:
+            for to_square in scan_reversed(BB_KING_ATTACKS[king] & target & ~info.king_danger()):
+                yield king | to_square << 6
+            if not checkers:
+                yield from self._generate_int_castling(from_mask, to_mask)
 
-                for to_square in scan_reversed(targets):
-                    # keep track if they check and remove from possible checkers
-                    # promotion captures
-                    if square_rank(to_square) in [0, 7]:
-                        yield Move(from_square, to_square, QUEEN), MoveType.CAPTURE
-                        yield Move(from_square, to_square, ROOK), MoveType.CAPTURE
-                        yield Move(from_square, to_square, BISHOP), MoveType.CAPTURE
-                        yield Move(from_square, to_square, KNIGHT), MoveType.CAPTURE
-                    else:
-                        yield Move(from_square, to_square), MoveType.CAPTURE
+        target &= info.check_mask()
+        if not target:
+            return
 
-        # winning captures, capturer > value than captured
-        # from most -> least valuable victim
-        # so in reverse is least valuable attacker 
-        # skips pawns as attackers (covered above)
-        # skips kings as victims
-        pieces = [self.queens, self.rooks, self.bishops, self.knights, self.pawns]
-        for i in range(5):
-            vics = pieces[i] & enemy_pieces
-            if not vics:
-                continue
-            for j in range(len(pieces)-2,-1,-1):
-                # winning captures first
-                if j<=i:
-                    break
-                atters = pieces[j] & our_pieces
-                for a in scan_reversed(atters):
-                    att_vics = self.attacks_mask(a) & vics
-                
-                    for v in scan_reversed(att_vics):
-                        assert self.is_capture(Move(a, v))
+        for from_square in scan_reversed(our_pieces & ~self.pawns & ~self.kings & from_mask):
+            moves = self.attacks_mask(from_square) & target
+            if pinned & BB_SQUARES[from_square]:
+                moves &= BB_RAYS[king][from_square]
+            for to_square in scan_reversed(moves):
+                yield from_square | to_square << 6
+
+        enemy = self.occupied_co[not turn]
+        empty = ~self.occupied
+        step = 8 if turn == WHITE else -8
+        start_rank = BB_RANK_2 if turn == WHITE else BB_RANK_7
+        for from_square in scan_reversed(our_pieces & self.pawns & from_mask):
+            moves = BB_PAWN_ATTACKS[turn][from_square] & enemy
+            single = BB_SQUARES[from_square + step] & empty
+            if single:
+                moves |= single
+                if BB_SQUARES[from_square] & start_rank:
+                    moves |= BB_SQUARES[from_square + 2 * step] & empty
+            moves &= target
+            if pinned & BB_SQUARES[from_square]:
+                moves &= BB_RAYS[king][from_square]
+            for to_square in scan_reversed(moves):
+                if BB_SQUARES[to_square] & BB_BACKRANKS:
+                    for promotion in PROMOTIONS:
+                        yield from_square | to_square << 6 | promotion
+                else:
+                    yield from_square | to_square << 6
 
-                        yield Move(a, v), MoveType.CAPTURE                    
+        if self.ep_square:
+            for move in self._generate_int_ep(from_mask, to_mask):
+                if self._is_legal_int_ep(king, checkers, pinned, move):
+                    yield move
 
-        # even captures
-        # q,r,b,n, p
-        for i in range(5):
-            vics = pieces[i] & enemy_pieces
-            atters = pieces[i] & our_pieces
-            for a in scan_reversed(atters):
-                att_vics = self.attacks_mask(a) & vics
-            
-                for v in scan_reversed(att_vics):
-                    assert self.is_capture(Move(a, v))
+    def generate_qs_captures(self) -> List[int]:
+        """
+        Legal captures and queen promotions for quiescence, in one pass over
+        our pieces. Each is packed as ``mvv_lva(victim, attacker) << 16 | move``,
+        so sorting the list in reverse puts the most valuable victim, then
+        the least valuable attacker first.
+        """
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        victims = self.occupied_co[not turn] & ~self.kings
+        mailbox = self.mailbox
+        captures = []
 
-                    yield Move(a, v), MoveType.CAPTURE           
-        
-        # losing captures
-        pieces = [self.queens, self.rooks, self.bishops, self.knights, self.pawns]
-        for i in range(5):
-            vics = pieces[i] & enemy_pieces
-            if not vics:
-                continue
-            for j in range(i):
-                atters = pieces[j] & our_pieces
-                for a in scan_reversed(atters):
-                    att_vics = self.attacks_mask(a) & vics
-                
-                    for v in scan_reversed(att_vics):
-                        assert self.is_capture(Move(a, v))
+        info = self.attack_info()
+        king = info.king
+        if king is None:
+            check_mask = BB_ALL
+        else:
+            check_mask = info.check_mask()
+            for to_square in scan_reversed(BB_KING_ATTACKS[king] & victims & ~info.king_danger()):
+                captures.append(mvv_lva(mailbox[to_square] & 7, KING) << 16 | king | to_square << 6)
+        if not check_mask:
+            return captures
+        pinned = info.pinned
+
+        backrank = BB_RANK_8 if turn == WHITE else BB_RANK_1
+        step = 8 if turn == WHITE else -8
+        empty = ~self.occupied
+        for from_square in scan_reversed(self.pawns & our_pieces):
+            targets = BB_PAWN_ATTACKS[turn][from_square] & victims
+            # promotions by a push
+            targets |= BB_SQUARES[from_square + step] & backrank & empty
+            targets &= check_mask
+            if pinned & BB_SQUARES[from_square]:
+                targets &= BB_RAYS[king][from_square]
+            for to_square in scan_reversed(targets):
+                score = mvv_lva(mailbox[to_square] & 7, PAWN)
+                if BB_SQUARES[to_square] & backrank:
+                    captures.append(score + (QUEEN << 3) << 16 | from_square | to_square << 6 | QUEEN_PROMOTION)
+                else:
+                    captures.append(score << 16 | from_square | to_square << 6)
 
-                        yield Move(a, v), MoveType.CAPTURE    
+        for from_square in scan_reversed(our_pieces & ~self.pawns & ~self.kings):
+            attacker = mailbox[from_square] & 7
+            targets = self.attacks_mask(from_square) & victims & check_mask
+            if pinned & BB_SQUARES[from_square]:
+                targets &= BB_RAYS[king][from_square]
+            for to_square in scan_reversed(targets):
+                captures.append(mvv_lva(mailbox[to_square] & 7, attacker) << 16 | from_square | to_square << 6)
 
-        # Generate en passants captures (other than en passants)
         if self.ep_square:
-            for mv in self.generate_pseudo_legal_ep(from_mask, to_mask):
-                yield mv, MoveType.EP_CAPTURE
-
-        # king captures
-        atters = self.kings & our_pieces
-        pieces = [self.queens, self.rooks, self.bishops, self.knights, self.pawns]
-        for i in range(5):
-            vics = pieces[i] & enemy_pieces
-            if not vics:
-                continue
-            for a in scan_reversed(atters):
-                att_vics = self.attacks_mask(a) & vics
-            
-                for v in scan_reversed(att_vics):
-                    assert self.is_capture(Move(a, v))
+            for move in self._generate_int_ep():
+                if king is None or self._is_legal_int_ep(king, info.checkers, pinned, move):
+                    captures.append(mvv_lva(PAWN, PAWN) << 16 | move)
 
-                    yield Move(a, v), MoveType.CAPTURE   
+        return captures
 
     # def generate_sorted_moves(self, from_mask = BB_ALL, to_mask = BB_ALL) -> Iterator[Move]:
 
@@ -2357,7 +2856,7 @@ class Board(BaseBoard):
     # Moving king into check
     # Moving a piece that is blocking a checked king
     # En passant that moves out of a pin on king (some other stuff maybe?)
-    def generate_sorted_pseudo_legal_moves(self, history = None, cm_hist = None, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[Move, MoveType]:
+    def generate_sorted_pseudo_legal_moves(self, history = None, cm_hist = None, from_mask: Bitboard = BB_ALL, to_mask: Bitboard = BB_ALL) -> Iterator[IntMove, MoveType]:
         our_pieces = self.occupied_co[self.turn] & from_mask
         enemy_pieces = self.occupied_co[not self.turn] & to_mask
 
@@ -2374,12 +2873,10 @@ class Board(BaseBoard):
                     # keep track if they check and remove from possible checkers
                     # promotion captures
                     if square_rank(to_square) in [0, 7]:
-                        yield Move(from_square, to_square, QUEEN), MoveType.CAPTURE
-                        yield Move(from_square, to_square, ROOK), MoveType.CAPTURE
-                        yield Move(from_square, to_square, BISHOP), MoveType.CAPTURE
-                        yield Move(from_square, to_square, KNIGHT), MoveType.CAPTURE
+                        for promotion in PROMOTIONS:
+                            yield from_square | to_square << 6 | promotion, MoveType.CAPTURE
                     else:
-                        yield Move(from_square, to_square), MoveType.CAPTURE
+                        yield from_square | to_square << 6, MoveType.CAPTURE
 
         # winning captures, capturer > value than captured
         # from most -> least valuable victim
@@ -2400,9 +2897,9 @@ class Board(BaseBoard):
                     att_vics = self.attacks_mask(a) & vics
                 
                     for v in scan_reversed(att_vics):
-                        assert self.is_capture(Move(a, v))
+                        assert BB_SQUARES[v] & self.occupied_co[not self.turn]
 
-                        yield Move(a, v), MoveType.CAPTURE                    
+                        yield a | v << 6, MoveType.CAPTURE                    
 
         # even captures
         # q,r,b,n, p
@@ -2413,13 +2910,13 @@ class Board(BaseBoard):
                 att_vics = self.attacks_mask(a) & vics
             
                 for v in scan_reversed(att_vics):
-                    assert self.is_capture(Move(a, v))
+                    assert BB_SQUARES[v] & self.occupied_co[not self.turn]
 
-                    yield Move(a, v), MoveType.CAPTURE  
+                    yield a | v << 6, MoveType.CAPTURE  
 
         # Generate en passants captures (other than en passants)
         if self.ep_square:
-            for move in self.generate_pseudo_legal_ep(from_mask, to_mask):
+            for move in self._generate_int_ep(from_mask, to_mask):
                 yield move, MoveType.CAPTURE
 
         # losing captures
@@ -2434,9 +2931,9 @@ class Board(BaseBoard):
                     att_vics = self.attacks_mask(a) & vics
                 
                     for v in scan_reversed(att_vics):
-                        assert self.is_capture(Move(a, v))
+                        assert BB_SQUARES[v] & self.occupied_co[not self.turn]
 
-                        yield Move(a, v), MoveType.CAPTURE          
+                        yield a | v << 6, MoveType.CAPTURE          
 
         # king captures
         atters = self.kings & our_pieces
@@ -2449,9 +2946,9 @@ class Board(BaseBoard):
                 att_vics = self.attacks_mask(a) & vics
             
                 for v in scan_reversed(att_vics):
-                    assert self.is_capture(Move(a, v))
+                    assert BB_SQUARES[v] & self.occupied_co[not self.turn]
 
-                    yield Move(a, v), MoveType.CAPTURE   
+                    yield a | v << 6, MoveType.CAPTURE   
 
 
         # Generate moves from non captures
@@ -2461,19 +2958,12 @@ class Board(BaseBoard):
         # 4. Bishop checks
         # 5. Rook checks
         # 6. Queen checks
-        # 7. other moves
-        # If it is a check, yield it first
+        # 7. King checks (discovered only)
+        # 8. other moves
+        # If it is a check (direct or discovered), yield it first
         # If not, cache it for later (provides better lower move ordering as well)
+        gives_check = self.attack_info().check_info().gives_check
 
-        enemy_king_mask = self.kings & enemy_pieces
-        if enemy_king_mask:
-            enemy_king = msb(enemy_king_mask)
-        else:
-            enemy_king = BB_EMPTY
-        #     checkers = self.king_checking_mask(self.turn, enemy_king)
-        # else:
-        #     checkers = BB_EMPTY
-        
         # Prepare pawn advance generation.
         if self.turn == WHITE:
             single_moves = pawns << 8 & ~self.occupied
@@ -2492,25 +2982,21 @@ class Board(BaseBoard):
             from_square = to_square + (8 if self.turn == BLACK else -8)
 
             if square_rank(to_square) in [0, 7]:
-                yield Move(from_square, to_square, QUEEN), MoveType.OTHER
-                yield Move(from_square, to_square, ROOK), MoveType.OTHER
-                yield Move(from_square, to_square, BISHOP), MoveType.OTHER
-                yield Move(from_square, to_square, KNIGHT), MoveType.OTHER
+                for promotion in PROMOTIONS:
+                    yield from_square | to_square << 6 | promotion, MoveType.OTHER
             else:
-                if enemy_king and BB_PAWN_ATTACKS[not self.turn][enemy_king] & BB_SQUARES[to_square]:
-                    assert self.gives_check(Move(from_square, to_square))
-                    yield Move(from_square, to_square), MoveType.CHECK
+                if gives_check(from_square | to_square << 6):
+                    yield from_square | to_square << 6, MoveType.CHECK
                 else:
-                    pawn_cache.append((from_square, to_square))
+                    pawn_cache.append(from_square | to_square << 6)
 
         # Generate double pawn moves.
         for to_square in scan_reversed(double_moves):
             from_square = to_square + (16 if self.turn == BLACK else -16)
-            if enemy_king and BB_PAWN_ATTACKS[not self.turn][enemy_king] & BB_SQUARES[to_square]:
-                assert self.gives_check(Move(from_square, to_square))
-                yield Move(from_square, to_square), MoveType.CHECK
+            if gives_check(from_square | to_square << 6):
+                yield from_square | to_square << 6, MoveType.CHECK
             else:
-                pawn_cache.append((from_square, to_square))
+                pawn_cache.append(from_square | to_square << 6)
 
 
         ours_mask = our_pieces & from_mask
@@ -2522,59 +3008,53 @@ class Board(BaseBoard):
         for from_sq in scan_reversed(knights):
             moves = self.attacks_mask(from_sq) & open_sq_mask
             for to_sq in scan_reversed(moves):
-                if enemy_king and BB_KNIGHT_ATTACKS[enemy_king] & BB_SQUARES[to_sq]:
-                    assert self.gives_check(Move(from_sq, to_sq))
-                    yield Move(from_sq, to_sq), MoveType.CHECK
+                if gives_check(from_sq | to_sq << 6):
+                    yield from_sq | to_sq << 6, MoveType.CHECK
                 else:
-                    knight_cache.append((from_sq, to_sq))
+                    knight_cache.append(from_sq | to_sq << 6)
         
-        rank_pieces = BB_RANK_MASKS[enemy_king] & self.occupied
-        file_pieces = BB_FILE_MASKS[enemy_king] & self.occupied
-        diag_pieces = BB_DIAG_MASKS[enemy_king] & our_pieces
-
         bishop_cache = []
         bishops = self.bishops & ours_mask
-        diag_check_mask = BB_DIAG_ATTACKS[enemy_king][diag_pieces]
         for from_sq in scan_reversed(bishops):
             moves = self.attacks_mask(from_sq) & open_sq_mask
             for to_sq in scan_reversed(moves):
-                if enemy_king and diag_check_mask & BB_SQUARES[to_sq]:
-                    yield Move(from_sq, to_sq), MoveType.CHECK
+                if gives_check(from_sq | to_sq << 6):
+                    yield from_sq | to_sq << 6, MoveType.CHECK
                 else:
-                    bishop_cache.append((from_sq, to_sq))
+                    bishop_cache.append(from_sq | to_sq << 6)
 
         rook_cache = []
         rooks = self.rooks & ours_mask
-        rank_check_mask = BB_RANK_ATTACKS[enemy_king][rank_pieces]
-        file_check_mask = BB_FILE_ATTACKS[enemy_king][file_pieces]
-
         for from_sq in scan_reversed(rooks):
             moves = self.attacks_mask(from_sq) & open_sq_mask
             for to_sq in scan_reversed(moves):
-                if enemy_king and (rank_check_mask & BB_SQUARES[to_sq] | file_check_mask & BB_SQUARES[to_sq]):
-                    yield Move(from_sq, to_sq), MoveType.CHECK
+                if gives_check(from_sq | to_sq << 6):
+                    yield from_sq | to_sq << 6, MoveType.CHECK
                 else:
-                    rook_cache.append((from_sq, to_sq))
+                    rook_cache.append(from_sq | to_sq << 6)
 
         queens = self.queens & ours_mask
         queen_cache = []
         for from_sq in scan_reversed(queens):
             moves = self.attacks_mask(from_sq) & open_sq_mask
             for to_sq in scan_reversed(moves):
-                if enemy_king and (rank_check_mask | file_check_mask | diag_check_mask) & BB_SQUARES[to_sq]:
-                    yield Move(from_sq, to_sq), MoveType.CHECK
+                if gives_check(from_sq | to_sq << 6):
+                    yield from_sq | to_sq << 6, MoveType.CHECK
                 else:
-                    queen_cache.append((from_sq, to_sq))
+                    queen_cache.append(from_sq | to_sq << 6)
 
         king_cache = []
         for from_sq in scan_reversed(self.kings & ours_mask):
             moves = self.attacks_mask(from_sq) & open_sq_mask
             for to_sq in scan_reversed(moves):
-                king_cache.append((from_sq, to_sq))
+                if gives_check(from_sq | to_sq << 6):
+                    yield from_sq | to_sq << 6, MoveType.CHECK
+                else:
+                    king_cache.append(from_sq | to_sq << 6)
 
         # # Generate castling moves.
         if from_mask & self.kings:
-            for move in self.generate_castling_moves(from_mask, to_mask):
+            for move in self._generate_int_castling(from_mask, to_mask):
                 yield move, MoveType.OTHER
 
         # Generate remaining non-capture, non-checking piece moves
@@ -2584,59 +3064,64 @@ class Board(BaseBoard):
         if history and cm_hist:
             # knights, bishops, rooks, queens, pawns, kings
             SORT_VALS = [10, 4000, 3000, 2000, 1000, 0]
-            cache_moves.sort(key = lambda mv: history[mv[0]][mv[1]]+SORT_VALS[self.piece_type_at(mv[0])-1], reverse=True)
-        for fr, to in cache_moves:
-            yield Move(fr, to), MoveType.OTHER
+            cache_moves.sort(key = lambda mv: history[mv & MOVE_SQUARES]+SORT_VALS[self.piece_type_at(mv & 0x3F)-1], reverse=True)
+        for move in cache_moves:
+            yield move, MoveType.OTHER
 
     def __hash__(self) -> int:
+        return self.zobrist
 
-            z_board = 0
-            # board
-            for pivot, squares in enumerate(self.occupied_co):
-                for square in scan_reversed(squares):
-                    piece_index = (typing.cast(PieceType, self.piece_type_at(square)) - 1) * 2 + pivot
-                    z_board ^= POLYGLOT_RANDOM_ARRAY[64 * piece_index + square]
-
-            # castling
-            z_castle = 0
-            for color in COLORS:
-                backrank = BB_RANK_1 if color == WHITE else BB_RANK_8
-                king_mask = self.kings & self.occupied_co[color] & backrank & ~self.promoted
-                if not king_mask:
-                    continue
-                castling_rights = self.clean_castling_rights() & backrank
-                while castling_rights:
-                    rook = castling_rights & -castling_rights
-
-                    if rook > king_mask: # kingside
-                        z_castle ^= POLYGLOT_RANDOM_ARRAY[768 + color*2]
-                    elif rook < king_mask: # queenside
-                        z_castle ^=  POLYGLOT_RANDOM_ARRAY[768 + color*2 + 1]
-
-                    castling_rights &= castling_rights - 1
-            
-            # Hash in the en passant file.
-            z_ep = 0
-            if self.ep_square:
-                # But only if there's actually a pawn ready to capture it. Legality
-                # of the potential capture is irrelevant.
-                if self.turn == WHITE:
-                    ep_mask = shift_down(BB_SQUARES[self.ep_square])
-                else:
-                    ep_mask = shift_up(BB_SQUARES[self.ep_square])
-                ep_mask = shift_left(ep_mask) | shift_right(ep_mask)
+    def _zobrist_hash(self) -> int:
+        """
+        Computes the Zobrist key of the position from scratch. The key is
+        otherwise kept up to date incrementally in :data:`~Board.zobrist`.
+        """
+        z_turn = 0
+        if self.turn:
+            z_turn = POLYGLOT_RANDOM_ARRAY[780]
 
-                if ep_mask & self.pawns & self.occupied_co[self.turn]:
-                    z_ep = POLYGLOT_RANDOM_ARRAY[772 + square_file(self.ep_square)]
-            
-            z_turn = 0
-            if self.turn:
-                z_turn = POLYGLOT_RANDOM_ARRAY[780]
-            
-            return z_board ^ z_castle ^ z_ep ^ z_turn
+        return self._zobrist_pieces() ^ self._zobrist_castling() ^ self._zobrist_ep() ^ z_turn
+
+    def _zobrist_castling(self) -> int:
+        z_castle = 0
+        for color in COLORS:
+            backrank = BB_RANK_1 if color == WHITE else BB_RANK_8
+            king_mask = self.kings & self.occupied_co[color] & backrank & ~self.promoted
+            if not king_mask:
+                continue
+            castling_rights = self.clean_castling_rights() & backrank
+            while castling_rights:
+                rook = castling_rights & -castling_rights
+
+                if rook > king_mask: # kingside
+                    z_castle ^= POLYGLOT_RANDOM_ARRAY[768 + color*2]
+                elif rook < king_mask: # queenside
+                    z_castle ^=  POLYGLOT_RANDOM_ARRAY[768 + color*2 + 1]
+
+                castling_rights &= castling_rights - 1
+        return z_castle
+
+    def _zobrist_ep(self) -> int:
+        # Hash in the en passant file.
+        if self.ep_square:
+            # But only if there's actually a pawn ready to capture it. Legality
+            # of the potential capture is irrelevant.
+            if self.turn == WHITE:
+                ep_mask = shift_down(BB_SQUARES[self.ep_square])
+            else:
+                ep_mask = shift_up(BB_SQUARES[self.ep_square])
+            ep_mask = shift_left(ep_mask) | shift_right(ep_mask)
+
+            if ep_mask & self.pawns & self.occupied_co[self.turn]:
+                return POLYGLOT_RANDOM_ARRAY[772 + square_file(self.ep_square)]
+        return 0
 
 
     def checkers_mask(self) -> Bitboard:
+        # reuse the attack info of this node if the search has built it
+        info = self._attack_infos[self._undo_ply]
+        if info is not None and info.key == self.zobrist:
+            return info.checkers
         king = self.king(self.turn)
         return BB_EMPTY if king is None else self.attackers_mask(not self.turn, king)
 
@@ -2731,6 +3216,135 @@ class Board(BaseBoard):
     def is_legal(self, move: Move) -> bool:
         return not self.is_variant_end() and self.is_pseudo_legal(move) and not self.is_into_check(move)
 
+    def gives_check_int(self, move: IntMove) -> bool:
+        """
+        :func:`~chess.Board.gives_check()` for an int move, answered from
+        the node's :class:`~chess.CheckInfo` without making the move.
+        """
+        return self.attack_info().check_info().gives_check(move)
+
+    def is_capture_int(self, move: IntMove) -> bool:
+        """:func:`~chess.Board.is_capture()` for an int move."""
+        return bool(BB_SQUARES[move >> 6 & 0x3F] & self.occupied_co[not self.turn]) or move & MOVE_FLAGS == MOVE_EN_PASSANT
+
+    def see(self, move: IntMove) -> int:
+        """
+        Static exchange evaluation of an int move: the material the side to
+        move wins on the target square if both sides keep recapturing with
+        their least valuable attacker, and either may stop when it pays.
+        Sliders behind a capturer join in as it leaves (x-rays). Pins are
+        not considered.
+        """
+        from_square = move & 0x3F
+        to_square = move >> 6 & 0x3F
+        flags = move & MOVE_FLAGS
+        if flags == MOVE_CASTLING:
+            return 0
+
+        occupied = self.occupied ^ BB_SQUARES[from_square]
+        if flags == MOVE_EN_PASSANT:
+            occupied ^= BB_SQUARES[to_square + (-8 if self.turn == WHITE else 8)]
+            gain = [SEE_VALUES[PAWN]]
+        else:
+            gain = [SEE_VALUES[self.piece_type_at(to_square) or 0]]
+
+        # value of the piece standing on the target square
+        if flags == MOVE_PROMOTION:
+            promotion = (move >> 12 & 3) + KNIGHT
+            gain[0] += SEE_VALUES[promotion] - SEE_VALUES[PAWN]
+            on_square = SEE_VALUES[promotion]
+        else:
+            on_square = SEE_VALUES[self.piece_type_at(from_square)]
+
+        color = not self.turn
+        while True:
+            attackers = self._attackers_mask(color, to_square, occupied) & occupied
+            if not attackers:
+                break
+
+            for piece_type in PIECE_TYPES:
+                candidates = attackers & self.pieces_mask(piece_type, color)
+                if candidates:
+                    break
+            attacker = BB_SQUARES[lsb(candidates)]
+
+            # the king may only take last
+            if piece_type == KING and self._attackers_mask(not color, to_square, occupied ^ attacker) & occupied:
+                break
+
+            gain.append(on_square - gain[-1])
+            on_square = SEE_VALUES[piece_type]
+            occupied ^= attacker
+            color = not color
+
+        for depth in range(len(gain) - 1, 0, -1):
+            gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        return gain[0]
+
+    def is_legal_int(self, move: IntMove) -> bool:
+        """
+        :func:`~chess.Board.is_legal()` for an int move from the engine
+        generators, e.g. a killer move found in another position.
+        """
+        if not move:
+            return False
+
+        from_square = move & 0x3F
+        to_square = move >> 6 & 0x3F
+        flags = move & MOVE_FLAGS
+        to_bb = BB_SQUARES[to_square]
+        our_pieces = self.occupied_co[self.turn]
+
+        # Source square must not be vacant.
+        if not our_pieces & BB_SQUARES[from_square]:
+            return False
+
+        # Castling and en passant are checked against the generators.
+        if flags == MOVE_CASTLING:
+            return move in self._generate_int_castling()
+        if flags == MOVE_EN_PASSANT:
+            if move not in self._generate_int_ep():
+                return False
+        elif our_pieces & to_bb:
+            return False
+        elif self.pawns & BB_SQUARES[from_square]:
+            # Promotions exactly when reaching the backrank.
+            if (flags == MOVE_PROMOTION) != bool(to_bb & BB_BACKRANKS):
+                return False
+            if to_bb & self.occupied:
+                if not BB_PAWN_ATTACKS[self.turn][from_square] & to_bb:
+                    return False
+            else:
+                step = 8 if self.turn == WHITE else -8
+                if to_square != from_square + step and not (
+                    to_square == from_square + 2 * step
+                    and square_rank(from_square) == (1 if self.turn == WHITE else 6)
+                    and not BB_SQUARES[from_square + step] & self.occupied
+                ):
+                    return False
+        elif flags or not self.attacks_mask(from_square) & to_bb:
+            return False
+
+        self.make_move(move)
+        try:
+            return not self.was_into_check()
+        finally:
+            self.unmake_move()
+
+    def to_int_move(self, move: Move) -> IntMove:
+        """Packs a :class:`~chess.Move` in this position into an int move."""
+        if not move:
+            return MOVE_NULL
+        if move.promotion:
+            return pack_move(move.from_square, move.to_square, move.promotion)
+        if self.is_castling(move):
+            a_side = square_file(move.to_square) < square_file(move.from_square)
+            king_to = square(2 if a_side else 6, square_rank(move.from_square))
+            return pack_move(move.from_square, king_to, flags=MOVE_CASTLING)
+        if self.is_en_passant(move):
+            return pack_move(move.from_square, move.to_square, flags=MOVE_EN_PASSANT)
+        return pack_move(move.from_square, move.to_square)
+
     def is_variant_end(self) -> bool:
         """
         Checks if the game is over due to a special variant end condition.
@@ -3040,22 +3654,6 @@ class Board(BaseBoard):
     def _board_state(self: BoardT) -> _BoardState[BoardT]:
         return _BoardState(self)
 
-    def _board_pieces_state(self: BoardT) -> _BoardPiecesState[BoardT]:
-        return _BoardPiecesState(
-            self.pawns,
-            self.knights,
-            self.bishops,
-            self.rooks,
-            self.queens,
-            self.kings,
-            self.occupied_co[WHITE],
-            self.occupied_co[BLACK],
-            self.occupied,
-            self.promoted,
-            self.turn,
-            self.ep_square
-        )
-
     def _push_capture(self, move: Move, capture_square: Square, piece_type: PieceType, was_promoted: bool) -> None:
         pass
 
@@ -3088,6 +3686,15 @@ class Board(BaseBoard):
         self.castling_rights = self.clean_castling_rights()  # Before pushing stack
         self.move_stack.append(self._from_chess960(self.chess960, move.from_square, move.to_square, move.promotion, move.drop))
         self._stack.append(board_state)
+        self._attack_infos[self._undo_ply] = None
+
+        # Take the castling and en passant terms out of the key, they are
+        # hashed back in for the new position once the move is made.
+        castling_rights = self.castling_rights
+        z_castle = self._zobrist_castling() if castling_rights else 0
+        if self.ep_square is not None:
+            self.zobrist ^= self._zobrist_ep()
+        self.zobrist ^= POLYGLOT_RANDOM_ARRAY[780]
 
         # Reset en passant square.
         ep_square = self.ep_square
@@ -3180,6 +3787,12 @@ class Board(BaseBoard):
         # Swap turn.
         self.turn = not self.turn
 
+        # Hash in the new castling and en passant terms.
+        if self.castling_rights != castling_rights:
+            self.zobrist ^= z_castle ^ self._zobrist_castling()
+        if self.ep_square is not None:
+            self.zobrist ^= self._zobrist_ep()
+
     def pop(self: BoardT) -> Move:
         """
         Restores the previous position and returns the last move from the stack.
@@ -3188,8 +3801,234 @@ class Board(BaseBoard):
         """
         move = self.move_stack.pop()
         self._stack.pop().restore(self)
+        self._attack_infos[self._undo_ply] = None
+        return move
+
+    def make_move(self, move: IntMove) -> None:
+        """
+        Lean version of :func:`~chess.Board.push()` for the search, standard
+        chess only, taking an int move (see :func:`~chess.pack_move()`).
+
+        Only what :func:`~chess.Board.unmake_move()` needs is kept, in
+        preallocated per ply slots, so no objects are allocated. The move is
+        not put on :data:`~chess.Board.move_stack`, and the
+        :data:`~chess.Board.promoted` mask is not maintained. Do not pop
+        moves pushed before this one until it has been unmade.
+
+        .. warning::
+            The move must be pseudo-legal or a null move, with its flags set
+            as the engine move generators do.
+        """
+        ply = self._undo_ply
+        if ply == len(self._undo_move):
+            self._undo_move.append(move)
+            self._undo_captured.append(0)
+            self._undo_castling.append(BB_EMPTY)
+            self._undo_ep.append(None)
+            self._undo_halfmove.append(0)
+            self._undo_zobrist.append(0)
+            self._attack_infos.append(None)
+
+        if not ply:
+            self.castling_rights = self.clean_castling_rights()
+        castling_rights = self.castling_rights
+        ep_square = self.ep_square
+        turn = self.turn
+
+        self._undo_move[ply] = move
+        self._undo_castling[ply] = castling_rights
+        self._undo_ep[ply] = ep_square
+        self._undo_halfmove[ply] = self.halfmove_clock
+        self._undo_zobrist[ply] = self.zobrist
+        self._undo_ply = ply + 1
+        self._attack_infos[ply + 1] = None
+
+        # Take the castling and en passant terms out of the key
+        z_castle = self._zobrist_castling() if castling_rights else 0
+        if ep_square is not None:
+            self.zobrist ^= self._zobrist_ep()
+        self.zobrist ^= POLYGLOT_RANDOM_ARRAY[780]
+
+        self.ep_square = None
+        self.halfmove_clock += 1
+        if turn == BLACK:
+            self.fullmove_number += 1
+
+        if not move:
+            self._undo_captured[ply] = 0
+            self.turn = not turn
+            return
+
+        from_square = move & 0x3F
+        to_square = move >> 6 & 0x3F
+        flags = move & MOVE_FLAGS
+        piece_type = self._remove_piece_at(from_square)
+        captured_piece_type = self.piece_type_at(to_square)
+        self._undo_captured[ply] = captured_piece_type or 0
+
+        if piece_type == PAWN:
+            self.halfmove_clock = 0
+            diff = to_square - from_square
+            if diff == 16:
+                self.ep_square = from_square + 8
+            elif diff == -16:
+                self.ep_square = from_square - 8
+            elif flags == MOVE_EN_PASSANT:
+                self._remove_piece_at(to_square - 8 if turn == WHITE else to_square + 8)
+                self._undo_captured[ply] = PAWN
+            elif flags == MOVE_PROMOTION:
+                piece_type = (move >> 12 & 0x3) + KNIGHT
+        elif piece_type == KING:
+            castling_rights &= ~BB_RANK_1 if turn == WHITE else ~BB_RANK_8
+            if flags == MOVE_CASTLING:
+                if to_square > from_square:
+                    self._remove_piece_at(to_square + 1)
+                    self._set_piece_at(to_square - 1, ROOK, turn)
+                else:
+                    self._remove_piece_at(to_square - 2)
+                    self._set_piece_at(to_square + 1, ROOK, turn)
+
+        if captured_piece_type:
+            self.halfmove_clock = 0
+
+        self._set_piece_at(to_square, piece_type, turn)
+        self.turn = not turn
+
+        # Hash in the new castling and en passant terms
+        castling_rights &= ~BB_SQUARES[from_square] & ~BB_SQUARES[to_square]
+        if castling_rights != self.castling_rights:
+            self.castling_rights = castling_rights
+            self.zobrist ^= z_castle ^ self._zobrist_castling()
+        if self.ep_square is not None:
+            self.zobrist ^= self._zobrist_ep()
+
+    def unmake_move(self) -> IntMove:
+        """
+        Takes back the last :func:`~chess.Board.make_move()` and returns the move.
+        """
+        ply = self._undo_ply - 1
+        self._undo_ply = ply
+        move = self._undo_move[ply]
+
+        turn = not self.turn
+        self.turn = turn
+        if turn == BLACK:
+            self.fullmove_number -= 1
+        self.castling_rights = self._undo_castling[ply]
+        self.ep_square = self._undo_ep[ply]
+        self.halfmove_clock = self._undo_halfmove[ply]
+
+        if move:
+            from_square = move & 0x3F
+            to_square = move >> 6 & 0x3F
+            flags = move & MOVE_FLAGS
+            piece_type = PAWN if flags == MOVE_PROMOTION else self.piece_type_at(to_square)
+            self._remove_piece_at(to_square)
+            self._set_piece_at(from_square, piece_type, turn)
+
+            captured_piece_type = self._undo_captured[ply]
+            if flags == MOVE_EN_PASSANT:
+                self._set_piece_at(to_square - 8 if turn == WHITE else to_square + 8, PAWN, not turn)
+            elif captured_piece_type:
+                self._set_piece_at(to_square, captured_piece_type, not turn)
+            elif flags == MOVE_CASTLING:
+                if to_square > from_square:
+                    self._remove_piece_at(to_square - 1)
+                    self._set_piece_at(to_square + 1, ROOK, turn)
+                else:
+                    self._remove_piece_at(to_square + 1)
+                    self._set_piece_at(to_square - 2, ROOK, turn)
+
+        self.zobrist = self._undo_zobrist[ply]
         return move
 
+    def attack_info(self) -> AttackInfo:
+        """
+        Gets the :class:`~chess.AttackInfo` of the position, building it on
+        first use. It is kept per ply of :func:`~chess.Board.make_move()`, so
+        the parent's attack info is still at hand after an unmake.
+        """
+        info = self._attack_infos[self._undo_ply]
+        if info is None or info.key != self.zobrist:
+            info = self._attack_infos[self._undo_ply] = AttackInfo(self)
+        return info
+
+    def has_repeated(self) -> bool:
+        """
+        Tests if the position occurred before since the last irreversible
+        move, looking back through the game (:func:`~chess.Board.push()`)
+        and the :func:`~chess.Board.make_move()` path by Zobrist key.
+
+        Only every second position can match, and the scan stops at the
+        halfmove clock and at null moves.
+        """
+        key = self.zobrist
+        ply = self._undo_ply
+        undo_zobrist = self._undo_zobrist
+        undo_move = self._undo_move
+        stack = self._stack
+        distance = 2
+        while distance <= self.halfmove_clock:
+            if distance <= ply:
+                # a null move in between means the side to move differs
+                if not undo_move[ply - distance + 1] or not undo_move[ply - distance]:
+                    return False
+                if undo_zobrist[ply - distance] == key:
+                    return True
+            else:
+                index = len(stack) - (distance - ply)
+                if index < 0:
+                    return False
+                if stack[index].zobrist == key:
+                    return True
+            distance += 2
+        return False
+
+    def has_game_cycle(self) -> bool:
+        """
+        Tests if the side to move has a reversible move to a position
+        reached earlier on the :func:`~chess.Board.make_move()` path, that
+        is, whether it can force a repetition right away.
+
+        Each key an odd number of plies back, up to the halfmove clock, is
+        looked up by its difference to the current key in the cuckoo
+        tables of reversible moves. A hit is a cycle if the squares between
+        the move's squares are empty.
+        """
+        ply = self._undo_ply
+        end = min(self.halfmove_clock, ply)
+        if end < 3 or not self._undo_move[ply - 1]:
+            return False
+
+        key = self.zobrist
+        undo_zobrist = self._undo_zobrist
+        undo_move = self._undo_move
+        occupied = self.occupied
+        distance = 3
+        while distance <= end:
+            # a null move in between means the side to move differs
+            if not undo_move[ply - distance + 1] or not undo_move[ply - distance]:
+                return False
+            move_key = key ^ undo_zobrist[ply - distance]
+            slot = cuckoo_slot_1(move_key)
+            if CUCKOO_KEYS[slot] != move_key:
+                slot = cuckoo_slot_2(move_key)
+            if CUCKOO_KEYS[slot] == move_key:
+                move = CUCKOO_MOVES[slot]
+                if not between(move & 0x3F, move >> 6 & 0x3F) & occupied:
+                    return True
+            distance += 2
+        return False
+
+    def peek_made(self) -> IntMove:
+        """
+        Gets the last move made with :func:`~chess.Board.make_move()`, or
+        the null move if there is none.
+        """
+        if not self._undo_ply:
+            return MOVE_NULL
+        return self._undo_move[self._undo_ply - 1]
+
     def peek(self) -> Move:
         """
         Gets the last move from the move stack.
@@ -4100,7 +4939,7 @@ class Board(BaseBoard):
         Returns valid castling rights filtered from
         :data:`~chess.Board.castling_rights`.
         """
-        if self._stack:
+        if self._stack or self._undo_ply:
             # No new castling rights are assigned in a game, so we can assume
             # they were filtered already.
             return self.castling_rights
@@ -4368,14 +5207,14 @@ class Board(BaseBoard):
 
         # Horizontal attack on the fifth or fourth rank.
         horizontal_attackers = self.occupied_co[not self.turn] & (self.rooks | self.queens)
-        if BB_RANK_ATTACKS[king][BB_RANK_MASKS[king] & occupancy] & horizontal_attackers:
+        if rank_attacks(king, occupancy) & horizontal_attackers:
             return True
 
         # Diagonal skewers. These are not actually possible in a real game,
         # because if the latest double pawn move covers a diagonal attack,
         # then the other side would have been in check already.
         diagonal_attackers = self.occupied_co[not self.turn] & (self.bishops | self.queens)
-        if BB_DIAG_ATTACKS[king][BB_DIAG_MASKS[king] & occupancy] & diagonal_attackers:
+        if diag_attacks(king, occupancy) & diagonal_attackers:
             return True
 
         return False
@@ -4384,9 +5223,9 @@ class Board(BaseBoard):
         rooks_and_queens = self.rooks | self.queens
         bishops_and_queens = self.bishops | self.queens
 
-        snipers = ((BB_RANK_ATTACKS[king][0] & rooks_and_queens) |
-                   (BB_FILE_ATTACKS[king][0] & rooks_and_queens) |
-                   (BB_DIAG_ATTACKS[king][0] & bishops_and_queens))
+        snipers = ((BB_RANK_RAYS[king] & rooks_and_queens) |
+                   (BB_FILE_RAYS[king] & rooks_and_queens) |
+                   (BB_DIAG_RAYS[king] & bishops_and_queens))
 
         blockers = 0
 
@@ -4464,6 +5303,7 @@ class Board(BaseBoard):
         self.clear_stack()
         self.ep_square = None if self.ep_square is None else msb(f(BB_SQUARES[self.ep_square]))
         self.castling_rights = f(self.castling_rights)
+        self.zobrist = self._zobrist_hash()
 
     def transform(self: BoardT, f: Callable[[Bitboard], Bitboard]) -> BoardT:
         board = self.copy(stack=False)
@@ -4473,6 +5313,7 @@ class Board(BaseBoard):
     def apply_mirror(self: BoardT) -> None:
         super().apply_mirror()
         self.turn = not self.turn
+        self.zobrist = self._zobrist_hash()
 
     def mirror(self: BoardT) -> BoardT:
         """
@@ -1,3 +1,6 @@
+from array import array
+from typing import Tuple
+
 from .board import (
     BLACK,
     COLORS,
@@ -21,125 +24,272 @@ from .board import (
     shift_right,
     BB_RANK_1, BB_RANK_2, BB_RANK_7, BB_RANK_8,
     BB_RANK_3, BB_RANK_6,
-    BB_RANKS, BB_FILES, BB_ALL, BB_EMPTY,
+    BB_RANKS, BB_FILES, BB_ALL, BB_EMPTY, BB_BACKRANKS,
+    POLYGLOT_RANDOM_ARRAY,
     square_file, square_rank,
     popcount
 )
-from .piece_square_tables import EG_TABLE, EG_TABLE_W, MG_TABLE, MG_TABLE_W
+from .material import material_table, probe_material  # noqa: F401
+from .piece_square_tables import EG_VALUE, GAME_PHASE_VALUES, MG_VALUE  # noqa: F401
 
 # need to change later maybe
 
 ''' TUNE '''
 MATE_VALUE = 8 * 1025 + 2 * 512 + 2 * 365 + 2 * 337
 
-# p, n, b, r, q, k
-MG_VALUE = [82, 337, 365, 477, 1025, 0]
-EG_VALUE = [94, 281, 297, 512, 936, 0]
-
-# p, n, b, r, q, k
-GAME_PHASE_VALUES = [0, 1, 1, 2, 4, 0]
+# piece values and game phase weights live in piece_square_tables, the board keeps running sums of them
 
 PAWN_SCALE = 0.35
+
+# connected pawns by rank from the pawn's own side
+RANK_SCALE = [0, 3, 4, 6, 15, 24, 48]
 ''' TUNE '''
 
-from functools import lru_cache
+# Bound on the terms after material + PST, an evaluation whose material + PST
+# is further than this outside the (alpha, beta) window stops there. The pawn
+# term is the only one: per pawn it is at most the connected bonus of a
+# supported phalanx pawn on the best rank and at least the isolated, doubled
+# and blocked penalties together, so one side's score is within 8 times that
+# and the difference of the two within 8 times the sum
+PAWN_BONUS_MAX = max(RANK_SCALE) * 3 + 11
+PAWN_PENALTY_MAX = 22 + 11
+LAZY_MARGIN = 8 * (PAWN_BONUS_MAX + PAWN_PENALTY_MAX) * PAWN_SCALE
+
+# 2**16 slots, 1MB
+EVAL_CACHE_BITS = 16
+
+# 2**14 slots, 448KB
+PAWN_TABLE_BITS = 14
+
+
+class EvalCache:
+    """
+    Zobrist keyed cache of static evaluations. Slots are indexed by the low
+    bits of the key and a colliding store simply overwrites the old entry.
+    """
+
+    def __init__(self, bits: int = EVAL_CACHE_BITS):
+        self.mask = (1 << bits) - 1
+        self.keys = array('Q', bytes(8 << bits))
+        self.scores = array('d', bytes(8 << bits))
+        self.hits = 0
+        self.misses = 0
+        # misses cut short by the window, see evaluate_static
+        self.lazy = 0
+
+    def clear(self) -> None:
+        self.keys = array('Q', bytes(8 * len(self.keys)))
+        self.scores = array('d', bytes(8 * len(self.scores)))
+        self.hits = 0
+        self.misses = 0
+        self.lazy = 0
+
+
+eval_cache = EvalCache()
+
+
+class PawnTable:
+    """
+    Cache of the pawn structure terms keyed by :data:`~Board.pawn_key`, which
+    change far less often than the position. A slot holds, per color, the
+    pawn score, the passed pawns and the files with a pawn (bit n for file
+    n), at index 2 * slot + color.
+
+    The pawn score reads which side is to move, so that is part of the key.
+    A position without pawns has key 0 with black to move and hits an empty
+    slot, whose zeros are its right entry.
+    """
+
+    def __init__(self, bits: int = PAWN_TABLE_BITS):
+        self.mask = (1 << bits) - 1
+        self.keys = array('Q', bytes(8 << bits))
+        self.scores = array('l', bytes(2 * array('l').itemsize << bits))
+        self.passed = array('Q', bytes(16 << bits))
+        self.files = array('B', bytes(2 << bits))
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self.__init__(self.mask.bit_length())
+
+
+pawn_table = PawnTable()
+
+
+# ranks from each color's own side, indexed [color][rank]
+RELATIVE_RANKS = [BB_RANKS[::-1], BB_RANKS]
+
+
+def _fill_up(bb: int) -> int:
+    bb |= bb << 8 & BB_ALL
+    bb |= bb << 16 & BB_ALL
+    return bb | bb << 32 & BB_ALL
+
+
+def _fill_down(bb: int) -> int:
+    bb |= bb >> 8
+    bb |= bb >> 16
+    return bb | bb >> 32
+
+
+def _pawn_score(board: BoardT, c: bool) -> int:
+    # pawn structure score of color c, the pawn eval term, worked out on
+    # whole bitboards: each feature is a set of pawns, weighted by count
+    # TODO - backward for weak unopposed pawn impl requires attackers
+    # direction, block ranks and pawn attacks follow the side to move, not c
+    pawns = board.occupied_co[c] & board.pawns
+    if not pawns:
+        return 0
+    their_pawns = board.occupied_co[not c] & board.pawns
+
+    if board.turn:
+        # pawns that are supported
+        supported = (shift_up_left(pawns) | shift_up_right(pawns)) & pawns
+        # doubled in classical sense and not supported
+        doubled = shift_down(pawns) & pawns & ~supported
+        # their pawn right in front
+        blocked = shift_down(their_pawns) & pawns & (BB_RANK_2 | BB_RANK_3)
+    else:
+        supported = (shift_down_left(pawns) | shift_down_right(pawns)) & pawns
+        doubled = shift_up(pawns) & pawns & ~supported
+        blocked = shift_up(their_pawns) & pawns & (BB_RANK_7 | BB_RANK_6)
+
+    # no friendly pawns in adjacent files
+    files = _fill_down(_fill_up(pawns))
+    isolated = pawns & ~(shift_left(files) | shift_right(files))
+    # their pawn at any point in same file
+    opposed = pawns & _fill_down(_fill_up(their_pawns))
+    # phalanx - pawns on adjacent files, same rank
+    phalanx = pawns & (shift_left(pawns) | shift_right(pawns))
+
+    # doubled/isolated penalties: -22 for both, -5 isolated, -11 doubled
+    score = -5 * popcount(isolated) - 6 * popcount(isolated & doubled) - 11 * popcount(doubled)
+
+    # connected bonus - phalanx or supported pawns, further up are more valuable
+    connected = (supported | phalanx) & ~BB_BACKRANKS
+    if connected:
+        ranks = RELATIVE_RANKS[c]
+        score += 11 * popcount(supported & connected)
+        for rank_bonus_idx in range(1, 7):
+            on_rank = connected & ranks[rank_bonus_idx]
+            if on_rank:
+                score += RANK_SCALE[rank_bonus_idx] * (
+                    2 * popcount(on_rank) + popcount(on_rank & phalanx) - popcount(on_rank & opposed)
+                )
+
+    # blocked penalty
+    if blocked:
+        ranks = RELATIVE_RANKS[c]
+        score -= 11 * popcount(blocked & ranks[2]) + 3 * popcount(blocked & ranks[3])
+    return score
+
+
+def probe_pawns(board: BoardT) -> int:
+    """Returns the pawn table slot of the position, filling it on a miss."""
+    key = board.pawn_key ^ POLYGLOT_RANDOM_ARRAY[780] if board.turn else board.pawn_key
+    slot = key & pawn_table.mask
+    if pawn_table.keys[slot] == key:
+        pawn_table.hits += 1
+        return slot
+
+    pawn_table.misses += 1
+    pawn_table.keys[slot] = key
+    for c in COLORS:
+        pawns = board.occupied_co[c] & board.pawns
+        their_pawns = board.occupied_co[not c] & board.pawns
+        pawn_table.scores[2 * slot + c] = _pawn_score(board, c)
+
+        # squares their pawns stop or attack on the way to promotion
+        front = _fill_down(shift_down(their_pawns)) if c else _fill_up(shift_up(their_pawns))
+        pawn_table.passed[2 * slot + c] = pawns & ~(front | shift_left(front) | shift_right(front))
+        pawn_table.files[2 * slot + c] = _fill_down(pawns) & BB_RANK_1
+    return slot
+
 
-@lru_cache
 def evaluate(board: BoardT, ply: int = 0, verbose: bool = False) -> float:
-    try:
-        next(board.generate_legal_moves())
-    except StopIteration:  # no moves
-        if board.is_check():
+    """
+    :func:`evaluate_static` that also scores mate and stalemate, for
+    :meth:`Game.eval` and tools. The search finds terminal nodes itself
+    and calls :func:`evaluate_static` directly.
+    """
+    # the legal move test and the check test share the node's attack info
+    if next(board.generate_legal_int_moves(), None) is None:  # no moves
+        if board.attack_info().checkers:
             # + ply prioritizes shorter checkmates
             return -MATE_VALUE + ply
         else:
             return 0  # stalemate
+    return evaluate_static(board, verbose=verbose)
+
+
+def evaluate_static(
+    board: BoardT,
+    alpha: float = -float('inf'),
+    beta: float = float('inf'),
+    verbose: bool = False,
+) -> float:
+    """
+    Evaluation of the position from the side to move's point of view,
+    without generating moves: a mated or stalemated side is scored as any
+    other position.
+
+    When material + PST alone is more than :data:`LAZY_MARGIN` outside the
+    (alpha, beta) window, the rest of the evaluation is skipped. The margin
+    bounds the skipped terms, so material + PST less the margin (above the
+    window) or plus the margin (below it) is returned: a bound on the full
+    score, on the same side of the window. It is not exact, so it isn't
+    cached.
+    """
+    # the 75 move rule is not part of the key, so those positions skip the cache
+    if verbose or board.halfmove_clock >= 150:
+        return _evaluate(board, alpha, beta, verbose)[0]
+
+    key = board.zobrist
+    index = key & eval_cache.mask
+    if eval_cache.keys[index] == key:
+        eval_cache.hits += 1
+        return eval_cache.scores[index]
+
+    eval_cache.misses += 1
+    score, exact = _evaluate(board, alpha, beta)
+    if exact:
+        eval_cache.keys[index] = key
+        eval_cache.scores[index] = score
+    else:
+        eval_cache.lazy += 1
+    return score
+
+
+def _evaluate(
+    board: BoardT,
+    alpha: float = -float('inf'),
+    beta: float = float('inf'),
+    verbose: bool = False,
+) -> Tuple[float, bool]:
+    # the score and whether it is exact, rather than a lazy exit
+    # material and phase come from the material table, pst sums from the board
+    material = probe_material(board)
     if (
-        board.is_insufficient_material()
+        material.draw
+        or (material.check_insufficient and board.is_insufficient_material())
         or board.is_seventyfive_moves()
     ):
-        return 0
-    # material from pieces
-    occ_co_pieces = {
-        True: {
-            PAWN: board.occupied_co[True] & board.pawns,
-            KNIGHT: board.occupied_co[True] & board.knights,
-            BISHOP: board.occupied_co[True] & board.bishops,
-            ROOK: board.occupied_co[True] & board.rooks,
-            QUEEN: board.occupied_co[True] & board.queens,
-            KING: board.occupied_co[True] & board.kings,
-        },
-        False: {
-            PAWN: board.occupied_co[False] & board.pawns,
-            KNIGHT: board.occupied_co[False] & board.knights,
-            BISHOP: board.occupied_co[False] & board.bishops,
-            ROOK: board.occupied_co[False] & board.rooks,
-            QUEEN: board.occupied_co[False] & board.queens,
-            KING: board.occupied_co[False] & board.kings,
-        },
-    }
-
-    # eval
-    # material + pst scoring
-    mgPhase = 0
-    mg_pst = [0, 0]
-    eg_pst = [0, 0]
-    # material = [0,0]
-    counts = [[], []]
-    for c in COLORS:
-        for p_type in PIECE_TYPES:
-            pcs = occ_co_pieces[c][p_type]
-            # pcs = board.occupied_co_p[c][p_type-1]
-
-            # get counts and increment game phase
-            p_type_idx = p_type - 1
-            cnt = 0
-            # cnt = pcs.bit_count()
-            # counts[c].append(cnt)
-
-            # pst stuff
-            for pc in scan_reversed(pcs):
-                cnt += 1
-                # A1 in top right for python-chess
-                # but A1 in bot right for PST
-                if c:
-                    mg_pst[c] += MG_TABLE_W[p_type_idx][pc]
-                    eg_pst[c] += EG_TABLE_W[p_type_idx][pc]
-                else:
-                    mg_pst[c] += MG_TABLE[p_type_idx][pc]
-                    eg_pst[c] += EG_TABLE[p_type_idx][pc]
-
-            counts[c].append(cnt)
-            mgPhase += cnt * GAME_PHASE_VALUES[p_type_idx]
-
-    if mgPhase > 24:
-        mgPhase = 24
-    egPhase = 24 - mgPhase
+        return 0, True
 
     # calc final result from early game/mid game contributions
-    eg = egPhase / 24
-    mg = mgPhase / 24
-
-    # finish pst
-    mgScore = mg_pst[WHITE] - mg_pst[BLACK]
-    egScore = eg_pst[WHITE] - eg_pst[BLACK]  # endgame
-    pst = mgScore * mg + egScore * eg
-
-    # finish material
-    material = [0, 0]
-    values = (
-        MG_VALUE[PAWN - 1] * mg + EG_VALUE[PAWN - 1] * eg,
-        MG_VALUE[KNIGHT - 1] * mg + EG_VALUE[KNIGHT - 1] * eg,
-        MG_VALUE[BISHOP - 1] * mg + EG_VALUE[BISHOP - 1] * eg,
-        MG_VALUE[ROOK - 1] * mg + EG_VALUE[ROOK - 1] * eg,
-        MG_VALUE[QUEEN - 1] * mg + EG_VALUE[QUEEN - 1] * eg,
-        MG_VALUE[KING - 1] * mg + EG_VALUE[KING - 1] * eg,
-    )
-    for i in range(6):
-        material[WHITE] += counts[WHITE][i] * values[i]
-        material[BLACK] += counts[BLACK][i] * values[i]
-
-    material_diff = material[WHITE] - material[BLACK]
+    mg = material.mg_weight
+    eg = material.eg_weight
+
+    material_pst = (board.mg_score + material.mg_value) * mg + (board.eg_score + material.eg_value) * eg
+
+    # lazy exit, the specialized endgames aren't bounded by the margin
+    if material.endgame is None:
+        lazy_score = material_pst if board.turn else -material_pst
+        # the margin side is a bound on the full score, the search can fail soft on it
+        if lazy_score - LAZY_MARGIN >= beta:
+            return lazy_score - LAZY_MARGIN, False
+        if lazy_score + LAZY_MARGIN <= alpha:
+            return lazy_score + LAZY_MARGIN, False
 
 
     # create attackers mask
@@ -165,83 +315,12 @@ def evaluate(board: BoardT, ply: int = 0, verbose: bool = False) -> float:
 
 
 
-    # pawns
-    # TODO - backward for weak unopposed pawn impl requires attackers
-    if board.turn:
-        back = shift_down
-        block_ranks = BB_RANK_2 | BB_RANK_3
-        pawn_att_squares = lambda pawns: shift_up_left(pawns) | shift_up_right(pawns)
-    else:
-        back = shift_up
-        block_ranks = BB_RANK_7 | BB_RANK_6
-        pawn_att_squares = lambda pawns: shift_down_left(pawns) | shift_down_right(pawns)
-
+    # pawns, kept in the pawn table
+    slot = probe_pawns(board)
     pawns_mgc = [0,0]
     mobility_mgc = [0,0]
     for c in COLORS:
-        pawns = occ_co_pieces[c][PAWN]
-
-        their_pawns = occ_co_pieces[not c][PAWN]
-        their_pawns_pushed = back(their_pawns)
-
-        # pawns that are supported
-        supp_pawns = pawn_att_squares(pawns) & pawns
-
-        # doubled in classical sense and not supported
-        doubled_pawns = (back(pawns) & pawns) & ~supp_pawns   
-        blocked_pawns = their_pawns_pushed & block_ranks
-        
-        score = 0
-        for pawn_sq in scan_reversed(pawns):
-            pawn = 1 << pawn_sq
-            file = BB_FILES[square_file(pawn_sq)]
-            files_adj = (shift_left(file) | shift_right(file))
-            # their pawn right in front
-            blocked = their_pawns_pushed & pawn & block_ranks
-            # their pawn at any point in same file
-            opposed = their_pawns & file
-            # no friendly pawns in adjacent files
-            isolated = files_adj & pawns
-            # defended by another pawn
-            supported = supp_pawns & pawn
-            # rank of pawn
-            rank = square_rank(pawn_sq)
-            rank_bonus_idx = rank if c else 7 - rank
-            # phalanx - pawns on adjacent files, same rank
-            phalanx = (files_adj & BB_RANKS[rank]) & pawns
-            # doubled - doubled and not supported
-            doubled = doubled_pawns & pawn
-
-            # doubled/isolated penalties
-            is_doubled = popcount(doubled) > 0
-            is_iso = popcount(isolated) == 0
-            if is_doubled and is_iso:
-                score -= 11
-            elif is_iso:
-                score -= 5
-            
-            if is_doubled:
-                score -= 11
-            
-            # connected bonus - phalanx or supported pawns
-            is_supp = popcount(supported) > 0
-            is_phal = popcount(phalanx) > 0
-            is_opp = popcount(opposed) > 0
-            # connected pawns further up are more valuable
-            rank_scale = [0, 3, 4, 6, 15, 24, 48]
-            if is_supp or is_phal:
-                if rank_bonus_idx not in (0,7):
-                    score += rank_scale[rank_bonus_idx] * (2+int(is_phal) - int(is_opp)) + 11 * int(is_supp)
-
-            # blocked penalty
-            is_blocked = popcount(blocked) > 0
-            if is_blocked:
-                if rank_bonus_idx == 2:
-                    score -= 11
-                elif rank_bonus_idx == 3:
-                    score -= 3
-
-        pawns_mgc[c] = score
+        pawns_mgc[c] = pawn_table.scores[2 * slot + c]
 
         # threats
 
@@ -267,13 +346,17 @@ def evaluate(board: BoardT, ply: int = 0, verbose: bool = False) -> float:
     # mobility
 
 
-    score = material_diff + pst + pawns_mg
+    score = material_pst + pawns_mg
+    # specialized endgames
+    if material.endgame is not None:
+        score = material.endgame(board, material.strong, score)
     if verbose:
-        print('Material', 'PST', 'Pawns MG', 'Score')
-        print(material_diff, pst, f'{pawns_mgc[WHITE]}, {pawns_mgc[BLACK]}', score)
+        print('Material', 'Material + PST', 'Pawns MG', 'Endgame', 'Score')
+        endgame = material.endgame.__name__ if material.endgame else None
+        print(material.balance, material_pst, f'{pawns_mgc[WHITE]}, {pawns_mgc[BLACK]}', endgame, score)
     
     score = score if board.turn else -score
-    return score
+    return score, True
 
 
 def evaluate_explained(board: BoardT) -> float:
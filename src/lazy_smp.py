@@ -0,0 +1,156 @@
+"""
+Lazy SMP: helper processes search the same root as the main search, sharing
+its transposition table, so each one mostly fills the table with results the
+others pick up.
+
+Helpers differ from the main search and from each other only a little: odd
+helpers start their iterative deepening one ply deeper, and each seeds its
+history with small random values, so they order moves differently and
+wander into different parts of the tree. Each completed iteration is sent
+back to the main process, which plays the deepest result it has.
+"""
+import multiprocessing as mp
+import random
+from multiprocessing.context import BaseContext
+from multiprocessing.synchronize import Event
+from queue import Empty
+from time import time
+from typing import List, Optional, Tuple
+
+from .board import Board, BoardT
+from .searcher_pvs import Searcher
+from .transposition import TranspositionTable
+
+# history of a helper starts at up to this instead of 0
+HISTORY_NOISE = 16
+
+# Helpers are forked from a server process that has only imported the engine,
+# forking the UCI process itself could copy locks its other threads hold (the
+# one on stdin) and deadlock the child. Where there is no forkserver (Windows)
+# they are spawned. Made on first use, so importing this module starts nothing.
+_context: Optional[BaseContext] = None
+
+# (depth, score, pv) of a completed iteration
+SearchResult = Tuple[int, float, List[str]]
+
+
+def _get_context() -> BaseContext:
+    global _context
+    if _context is None:
+        if 'forkserver' in mp.get_all_start_methods():
+            _context = mp.get_context('forkserver')
+            _context.set_forkserver_preload([__name__])
+        else:
+            _context = mp.get_context('spawn')
+    return _context
+
+
+def _helper(
+    tt_name: str,
+    tt_size_mb: int,
+    tt_generation: int,
+    fen: str,
+    moves: List[str],
+    max_depth: int,
+    helper_id: int,
+    results: mp.Queue,
+    stop_event: Event,
+) -> None:
+    board = Board(fen)
+    for move in moves:
+        board.push_uci(move)
+
+    tt = TranspositionTable(tt_size_mb, name=tt_name)
+    tt.generation = tt_generation
+    searcher = Searcher(tt=tt)
+    rng = random.Random(helper_id)
+    for history in searcher.history.values():
+        history[:] = [rng.randrange(HISTORY_NOISE) for _ in history]
+
+    # strict time, so a stop ends the current iteration too
+    searcher.start = time()
+    searcher.strict_time = True
+    searcher.stop_event = stop_event
+    try:
+        for score, pv in searcher._search_at_depth(board, max_depth, start_depth=1 + helper_id % 2):
+            # an iteration cut off by the stop is incomplete
+            if stop_event.is_set():
+                break
+            results.put((searcher.ids_depth, score, pv))
+    finally:
+        tt.close()
+
+
+class LazySMP:
+    """
+    Runs *n_helpers* helper processes next to a main search that uses *tt*,
+    which must be a shared :class:`TranspositionTable`.
+    """
+
+    def __init__(self, n_helpers: int, tt: TranspositionTable, tt_size_mb: int):
+        self.n_helpers = n_helpers
+        self.tt = tt
+        self.tt_size_mb = tt_size_mb
+        self.processes: List[mp.Process] = []
+        self.results: Optional[mp.Queue] = None
+        self.stop_event: Optional[Event] = None
+
+    def start(self, board: BoardT, max_depth: int) -> None:
+        """Starts the helpers on *board*, once the main search has started a new table generation."""
+        context = _get_context()
+        self.results = context.Queue()
+        self.stop_event = context.Event()
+        root = board.root()
+        moves = [move.uci() for move in board.move_stack]
+        self.processes = [
+            context.Process(
+                target=_helper,
+                args=(
+                    self.tt.name,
+                    self.tt_size_mb,
+                    self.tt.generation,
+                    root.fen(),
+                    moves,
+                    max_depth,
+                    helper_id,
+                    self.results,
+                    self.stop_event,
+                ),
+                daemon=True,
+            )
+            for helper_id in range(self.n_helpers)
+        ]
+        for process in self.processes:
+            process.start()
+
+    def stop(self) -> List[SearchResult]:
+        """Stops the helpers, returning every iteration they completed."""
+        if not self.processes:
+            return []
+        self.stop_event.set()
+        results = []
+        # drain while joining, a helper blocked on a full queue never exits
+        while any(process.is_alive() for process in self.processes):
+            results.extend(self._drain())
+            for process in self.processes:
+                process.join(timeout=0.01)
+        results.extend(self._drain())
+        self.processes = []
+        return results
+
+    def _drain(self) -> List[SearchResult]:
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except Empty:
+                return results
+
+
+def deepest(results: List[SearchResult]) -> Optional[SearchResult]:
+    """The result of the deepest completed iteration, the earliest of those on ties."""
+    best = None
+    for result in results:
+        if result[2] and (best is None or result[0] > best[0]):
+            best = result
+    return best
@@ -0,0 +1,163 @@
+"""
+Material table: everything in the evaluation that depends only on how many
+pieces of each kind are on the board, keyed by :data:`~Board.material_key`.
+
+An entry holds the material sums, the game phase weights and what is known
+about the material combination: known draws (bare kings, a lone minor, two
+knights) and the endgames that get a dedicated term (KXK, KBNK, KPK). There
+are few distinct material combinations in a search, so entries are built
+on first use and kept.
+"""
+from typing import Callable, Dict, Optional
+
+from .board import (
+    BB_DARK_SQUARES,
+    BISHOP,
+    BLACK,
+    COLORS,
+    KING,
+    KNIGHT,
+    PAWN,
+    PIECE_TYPES,
+    QUEEN,
+    ROOK,
+    WHITE,
+    BoardT,
+    Color,
+    material_count,
+    msb,
+    square,
+    square_distance,
+    square_file,
+)
+from .piece_square_tables import EG_VALUE, GAME_PHASE_VALUES, MG_VALUE
+
+# Score adjustment of a specialized endgame, given the board, the strong side
+# and the score so far (white's point of view), returns the new score
+Endgame = Callable[[BoardT, Color, float], float]
+
+# bare king driven to the edge, both kings brought together
+PUSH_TO_EDGE = [10 * (max(3 - f, f - 4) + max(3 - r, r - 4)) for r in range(8) for f in range(8)]
+PUSH_CLOSE = [0] + [10 * (7 - d) for d in range(1, 8)]
+# ... and, with bishop and knight, into a corner the bishop covers
+PUSH_TO_CORNER = 20
+
+DARK_CORNERS = [square(0, 0), square(7, 7)]
+LIGHT_CORNERS = [square(7, 0), square(0, 7)]
+
+
+def _mop_up(board: BoardT, strong: Color) -> int:
+    weak_king = board.king(not strong)
+    return PUSH_TO_EDGE[weak_king] + PUSH_CLOSE[square_distance(board.king(strong), weak_king)]
+
+
+def _kxk(board: BoardT, strong: Color, score: float) -> float:
+    # mating material against a bare king
+    bonus = _mop_up(board, strong)
+    return score + bonus if strong else score - bonus
+
+
+def _kbnk(board: BoardT, strong: Color, score: float) -> float:
+    # only mates in a corner of the bishop's color
+    weak_king = board.king(not strong)
+    corners = DARK_CORNERS if board.bishops & BB_DARK_SQUARES else LIGHT_CORNERS
+    bonus = _mop_up(board, strong)
+    bonus += PUSH_TO_CORNER * (7 - min(square_distance(weak_king, corner) for corner in corners))
+    return score + bonus if strong else score - bonus
+
+
+def _kpk(board: BoardT, strong: Color, score: float) -> float:
+    # a rook pawn can't win once the defending king holds the queening corner
+    file = square_file(msb(board.pawns))
+    if file not in (0, 7):
+        return score
+    queening = square(file, 7 if strong == WHITE else 0)
+    if square_distance(board.king(not strong), queening) <= 1:
+        return 0
+    return score
+
+
+class MaterialEntry:
+    """
+    What the evaluation needs from a material key, see :func:`probe_material`.
+    Material values are from white's point of view.
+    """
+
+    __slots__ = (
+        'mg_value',
+        'eg_value',
+        'mg_weight',
+        'eg_weight',
+        'balance',
+        'draw',
+        'check_insufficient',
+        'endgame',
+        'strong',
+    )
+
+    def __init__(self, material_key: int):
+        # counts[color][piece_type]
+        counts = [
+            [material_count(material_key, piece_type, color) for piece_type in range(KING + 1)]
+            for color in [BLACK, WHITE]
+        ]
+
+        self.mg_value = 0
+        self.eg_value = 0
+        phase = 0
+        for color in COLORS:
+            sign = 1 if color else -1
+            for piece_type in PIECE_TYPES:
+                count = counts[color][piece_type]
+                self.mg_value += sign * count * MG_VALUE[piece_type - 1]
+                self.eg_value += sign * count * EG_VALUE[piece_type - 1]
+                phase += count * GAME_PHASE_VALUES[piece_type - 1]
+
+        # tapered from middle to end game by the phase, 24 with all pieces
+        phase = min(phase, 24)
+        self.mg_weight = phase / 24
+        self.eg_weight = (24 - phase) / 24
+        self.balance = self.mg_value * self.mg_weight + self.eg_value * self.eg_weight
+
+        def pawns_and_majors(color: Color) -> int:
+            return counts[color][PAWN] + counts[color][ROOK] + counts[color][QUEEN]
+
+        def minors(color: Color) -> int:
+            return counts[color][KNIGHT] + counts[color][BISHOP]
+
+        def bare(color: Color) -> bool:
+            return not pawns_and_majors(color) and not minors(color)
+
+        def cant_win(color: Color) -> bool:
+            # no mate can be forced with a lone minor, or two knights against a bare king
+            if pawns_and_majors(color):
+                return False
+            return minors(color) <= 1 or (counts[color][KNIGHT] == 2 and not counts[color][BISHOP] and bare(not color))
+
+        self.draw = cant_win(WHITE) and cant_win(not WHITE)
+        # only kings and minors: same colored bishops still need a look at the board
+        self.check_insufficient = not pawns_and_majors(WHITE) and not pawns_and_majors(not WHITE)
+
+        self.endgame: Optional[Endgame] = None
+        self.strong = WHITE
+        for strong in COLORS:
+            if not bare(not strong) or self.draw:
+                continue
+            self.strong = strong
+            if counts[strong][ROOK] or counts[strong][QUEEN]:
+                self.endgame = _kxk
+            elif not counts[strong][PAWN] and counts[strong][KNIGHT] == 1 and counts[strong][BISHOP] == 1:
+                self.endgame = _kbnk
+            elif counts[strong][PAWN] == 1 and not minors(strong):
+                self.endgame = _kpk
+
+
+material_table: Dict[int, MaterialEntry] = {}
+
+
+def probe_material(board: BoardT) -> MaterialEntry:
+    """The material table entry of the position, built on first use."""
+    entry = material_table.get(board.material_key)
+    if entry is None:
+        entry = material_table[board.material_key] = MaterialEntry(board.material_key)
+    return entry
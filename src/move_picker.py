@@ -0,0 +1,277 @@
+from typing import Iterator, List, Sequence, Tuple
+
+from .board import (
+    BB_BACKRANKS,
+    BB_KING_ATTACKS,
+    BB_KNIGHT_ATTACKS,
+    BB_PAWN_ATTACKS,
+    BB_RANK_1,
+    BB_RANK_2,
+    BB_RANK_7,
+    BB_RANK_8,
+    BB_RAYS,
+    BB_SQUARES,
+    BISHOP,
+    KING,
+    KNIGHT,
+    MOVE_EN_PASSANT,
+    MOVE_FLAGS,
+    MOVE_NULL,
+    MOVE_PROMOTION,
+    MOVE_SQUARES,
+    PAWN,
+    QUEEN,
+    QUEEN_PROMOTION,
+    ROOK,
+    SEE_VALUES,
+    WHITE,
+    Bitboard,
+    BoardT,
+    IntMove,
+    MoveType,
+    Square,
+    mvv_lva,
+    scan_reversed,
+)
+
+# Ordering of the stages, each is generated only once the previous one is exhausted
+STAGE_TT = 0
+STAGE_GOOD_CAPTURES = 1
+STAGE_KILLERS = 2
+STAGE_COUNTER = 3
+STAGE_QUIETS = 4
+STAGE_BAD_CAPTURES = 5
+
+# Scored moves are packed as score << 16 | move so a list of them sorts by score
+SCORE_SHIFT = 16
+MOVE_MASK = 0xFFFF
+
+# taking a piece worth at least the capturer can't lose material, other captures are split by SEE
+CAPTURE_VALUE = [0, 1, 3, 3, 5, 9, 0]
+# keeps SEE scores of bad captures positive
+BAD_CAPTURE_OFFSET = 2 * SEE_VALUES[QUEEN]
+# quiets of the same history are tried knights, bishops, rooks, queens, pawns then king
+QUIET_BONUS = [0, 10, 4000, 3000, 2000, 1000, 0]
+CASTLING_BONUS = 5000
+
+UNDER_PROMOTIONS = [MOVE_PROMOTION | (piece_type - KNIGHT) << 12 for piece_type in [ROOK, BISHOP, KNIGHT]]
+
+
+class MovePicker:
+    """
+    Yields the legal moves of a node as (move, move type) in stages:
+    the TT move, good captures, killers, the counter move, quiets by history
+    and finally bad captures.
+
+    Each stage is only generated once the ones before it are used up, so a
+    cutoff on the TT move or a capture never pays for quiet generation.
+    Moves are generated legal from the node's :class:`AttackInfo`: the check
+    mask and pins are worked out once per node and the king moves against
+    the enemy attack map.
+    """
+
+    def __init__(
+        self,
+        board: BoardT,
+        history: List[int],
+        tt_move: IntMove = MOVE_NULL,
+        killers: Sequence[IntMove] = (),
+        counter_move: IntMove = MOVE_NULL,
+    ):
+        self.board = board
+        self.tt_move = tt_move
+        self.killers = killers
+        self.counter_move = counter_move
+        self.history = history
+        self.stage = STAGE_TT
+
+    def __iter__(self) -> Iterator[Tuple[IntMove, MoveType]]:
+        board = self.board
+        tt_move = self.tt_move
+
+        info = board.attack_info()
+        if info.king is None:
+            return
+        self.info = info
+        self.king = info.king
+        self.checkers = info.checkers
+        self.check_mask = info.check_mask()
+        self.pinned = info.pinned
+
+        if tt_move and board.is_legal_int(tt_move):
+            yield tt_move, MoveType.CUSTOM
+        else:
+            tt_move = MOVE_NULL
+
+        self.stage = STAGE_GOOD_CAPTURES
+        good, bad = self._scored_captures()
+        good.sort(reverse=True)
+        for scored in good:
+            move = scored & MOVE_MASK
+            if move != tt_move:
+                yield move, MoveType.CAPTURE
+
+        # refutations are quiets from other nodes, so need a full legality check
+        self.stage = STAGE_KILLERS
+        tried = [tt_move]
+        for killer in self.killers:
+            if killer not in tried and self._is_quiet(killer) and board.is_legal_int(killer):
+                tried.append(killer)
+                yield killer, MoveType.CUSTOM
+
+        self.stage = STAGE_COUNTER
+        counter = self.counter_move
+        if counter not in tried and self._is_quiet(counter) and board.is_legal_int(counter):
+            tried.append(counter)
+            yield counter, MoveType.CUSTOM
+
+        # direct checks go ahead of the other quiets
+        self.stage = STAGE_QUIETS
+        checks, quiets = self._scored_quiets()
+        checks.sort(reverse=True)
+        for scored in checks:
+            move = scored & MOVE_MASK
+            if move not in tried:
+                yield move, MoveType.CHECK
+        quiets.sort(reverse=True)
+        for scored in quiets:
+            move = scored & MOVE_MASK
+            if move not in tried:
+                yield move, MoveType.OTHER
+
+        self.stage = STAGE_BAD_CAPTURES
+        bad.sort(reverse=True)
+        for scored in bad:
+            move = scored & MOVE_MASK
+            if move != tt_move:
+                yield move, MoveType.CAPTURE
+
+    def _is_quiet(self, move: IntMove) -> bool:
+        board = self.board
+        return bool(
+            move
+            and move & MOVE_FLAGS not in (MOVE_PROMOTION, MOVE_EN_PASSANT)
+            and not board.occupied_co[not board.turn] & BB_SQUARES[move >> 6 & 0x3F]
+        )
+
+    def _legal_targets(self, from_square: Square, targets: Bitboard) -> Bitboard:
+        """Narrows the targets of a piece to the squares it can legally move to."""
+        if from_square == self.king:
+            return targets & ~self.info.king_danger()
+        targets &= self.check_mask
+        if self.pinned & BB_SQUARES[from_square]:
+            targets &= BB_RAYS[self.king][from_square]
+        return targets
+
+    def _scored_captures(self) -> Tuple[List[int], List[int]]:
+        """
+        Legal captures and promotions split into good and bad. Good captures
+        are scored by MVV-LVA, bad ones (negative SEE) by their SEE. Queen
+        promotions count as good, under promotions as bad.
+        """
+        board = self.board
+        turn = board.turn
+        our_pieces = board.occupied_co[turn]
+        victims = board.occupied_co[not turn] & ~board.kings
+        good = []
+        bad = []
+
+        backrank = BB_RANK_8 if turn == WHITE else BB_RANK_1
+        step = 8 if turn == WHITE else -8
+        empty = ~board.occupied
+        for from_square in scan_reversed(board.pawns & our_pieces):
+            targets = BB_PAWN_ATTACKS[turn][from_square] & victims
+            # promotions by a push
+            if BB_SQUARES[from_square + step] & backrank & empty:
+                targets |= BB_SQUARES[from_square + step]
+            for to_square in scan_reversed(self._legal_targets(from_square, targets)):
+                move = from_square | to_square << 6
+                score = mvv_lva(board.piece_type_at(to_square), PAWN) if BB_SQUARES[to_square] & victims else 0
+                if BB_SQUARES[to_square] & backrank:
+                    good.append((score + (QUEEN << 3)) << SCORE_SHIFT | move | QUEEN_PROMOTION)
+                    for promotion in UNDER_PROMOTIONS:
+                        bad.append(score << SCORE_SHIFT | move | promotion)
+                else:
+                    good.append(score << SCORE_SHIFT | move)
+
+        if board.ep_square:
+            for move in board._generate_int_ep():
+                if board._is_legal_int_ep(self.king, self.checkers, self.pinned, move):
+                    good.append(mvv_lva(PAWN, PAWN) << SCORE_SHIFT | move)
+
+        for attacker in [KNIGHT, BISHOP, ROOK, QUEEN, KING]:
+            attacker_value = CAPTURE_VALUE[attacker]
+            for from_square in scan_reversed(board.pieces_mask(attacker, turn)):
+                targets = self._legal_targets(from_square, board.attacks_mask(from_square) & victims)
+                for to_square in scan_reversed(targets):
+                    victim = board.piece_type_at(to_square)
+                    move = from_square | to_square << 6
+                    if CAPTURE_VALUE[victim] >= attacker_value:
+                        good.append(mvv_lva(victim, attacker) << SCORE_SHIFT | move)
+                        continue
+                    see = board.see(move)
+                    if see >= 0:
+                        good.append(mvv_lva(victim, attacker) << SCORE_SHIFT | move)
+                    else:
+                        bad.append(see + BAD_CAPTURE_OFFSET << SCORE_SHIFT | move)
+
+        return good, bad
+
+    def _scored_quiets(self) -> Tuple[List[int], List[int]]:
+        """
+        Legal quiet moves (no captures or promotions) scored by history,
+        split into direct checks and the rest.
+        """
+        board = self.board
+        turn = board.turn
+        history = self.history
+        our_pieces = board.occupied_co[turn]
+        occupied = board.occupied
+        empty = ~occupied
+        checks = []
+        quiets = []
+
+        # squares each piece type gives check from, a discoverer checks
+        # from anywhere off its line to the king
+        check_info = self.info.check_info()
+        check_squares = check_info.check_squares
+        discoverers = check_info.discoverers
+        enemy_king = check_info.king
+
+        bonus = QUIET_BONUS[PAWN]
+        step = 8 if turn == WHITE else -8
+        start_rank = BB_RANK_2 if turn == WHITE else BB_RANK_7
+        for from_square in scan_reversed(board.pawns & our_pieces):
+            targets = BB_SQUARES[from_square + step] & empty & ~BB_BACKRANKS
+            if targets and BB_SQUARES[from_square] & start_rank:
+                targets |= BB_SQUARES[from_square + 2 * step] & empty
+            checking = check_squares[PAWN]
+            if discoverers & BB_SQUARES[from_square]:
+                checking |= ~BB_RAYS[enemy_king][from_square]
+            for to_square in scan_reversed(self._legal_targets(from_square, targets)):
+                move = from_square | to_square << 6
+                scored = (history[move & MOVE_SQUARES] + bonus) << SCORE_SHIFT | move
+                (checks if BB_SQUARES[to_square] & checking else quiets).append(scored)
+
+        for piece_type in [KNIGHT, BISHOP, ROOK, QUEEN, KING]:
+            bonus = QUIET_BONUS[piece_type]
+            for from_square in scan_reversed(board.pieces_mask(piece_type, turn)):
+                checking = check_squares[piece_type]
+                if discoverers & BB_SQUARES[from_square]:
+                    checking |= ~BB_RAYS[enemy_king][from_square]
+                if piece_type == KNIGHT:
+                    targets = BB_KNIGHT_ATTACKS[from_square] & empty
+                elif piece_type == KING:
+                    targets = BB_KING_ATTACKS[from_square] & empty
+                else:
+                    targets = board.attacks_mask(from_square) & empty
+                for to_square in scan_reversed(self._legal_targets(from_square, targets)):
+                    move = from_square | to_square << 6
+                    scored = (history[move & MOVE_SQUARES] + bonus) << SCORE_SHIFT | move
+                    (checks if BB_SQUARES[to_square] & checking else quiets).append(scored)
+
+        if not self.checkers:
+            for move in board._generate_int_castling():
+                quiets.append((history[move & MOVE_SQUARES] + CASTLING_BONUS) << SCORE_SHIFT | move)
+
+        return checks, quiets
@@ -0,0 +1,165 @@
+"""
+Perft, the number of leaf nodes of the legal move tree to a fixed depth.
+Checks move generation against python-chess and measures its throughput.
+
+    python -m src.perft --depth 5
+    python -m src.perft --fen "<fen>" --depth 5 --divide --hash 64
+
+Leaves are counted in bulk: at depth 1 the legal moves are counted without
+being made. With ``--hash`` subtree counts are kept in a Zobrist keyed
+table, and ``--divide`` prints the count below each root move, splitting
+the root moves over worker processes.
+"""
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+from typing import Callable, List, Optional, Tuple
+
+import chess
+
+from .board import STARTING_FEN, Board, BoardT, IntMove, move_uci
+
+# Each slot is the zobrist key and the count packed with the depth:
+#   bits 0-7   depth
+#   bits 8-63  node count
+SLOT_BYTES = 16
+
+
+class PerftTable:
+    """
+    Fixed size always-replace table of subtree counts, keyed by the Zobrist
+    key and the remaining depth.
+    """
+
+    def __init__(self, size_mb: int):
+        n_slots = 1
+        while n_slots * 2 * SLOT_BYTES <= size_mb * 1024 * 1024:
+            n_slots *= 2
+        self.mask = n_slots - 1
+        self.keys = array('Q', bytes(8 * n_slots))
+        self.counts = array('Q', bytes(8 * n_slots))
+
+    def probe(self, key: int, depth: int) -> int:
+        """Returns the stored count, or -1 if there is none."""
+        index = key & self.mask
+        entry = self.counts[index]
+        if entry and self.keys[index] == key and entry & 0xFF == depth:
+            return entry >> 8
+        return -1
+
+    def store(self, key: int, depth: int, count: int) -> None:
+        index = key & self.mask
+        self.keys[index] = key
+        self.counts[index] = count << 8 | depth
+
+
+def perft(board: BoardT, depth: int, table: Optional[PerftTable] = None) -> int:
+    """Counts the leaves of the legal move tree of *board* to *depth*."""
+    if depth <= 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in board.generate_legal_int_moves())
+
+    if table is not None:
+        count = table.probe(board.zobrist, depth)
+        if count >= 0:
+            return count
+
+    count = 0
+    for move in board.generate_legal_int_moves():
+        board.make_move(move)
+        count += perft(board, depth - 1, table)
+        board.unmake_move()
+
+    if table is not None:
+        table.store(board.zobrist, depth, count)
+    return count
+
+
+def perft_python_chess(board: chess.Board, depth: int) -> int:
+    """:func:`perft` with python-chess, counting leaves in bulk the same way."""
+    if depth <= 0:
+        return 1
+    if depth == 1:
+        return board.legal_moves.count()
+
+    count = 0
+    for move in board.generate_legal_moves():
+        board.push(move)
+        count += perft_python_chess(board, depth - 1)
+        board.pop()
+    return count
+
+
+# table of a divide worker process, kept across the root moves it is given
+_worker_table: Optional[PerftTable] = None
+
+
+def _init_worker(hash_mb: int) -> None:
+    global _worker_table
+    _worker_table = PerftTable(hash_mb) if hash_mb else None
+
+
+def _divide_move(fen: str, move: IntMove, depth: int) -> Tuple[IntMove, int]:
+    # runs in a worker process, so it gets a board of its own
+    board = Board(fen)
+    board.make_move(move)
+    return move, perft(board, depth - 1, _worker_table)
+
+
+def divide(fen: str, depth: int, hash_mb: int = 0, workers: Optional[int] = None) -> List[Tuple[IntMove, int]]:
+    """
+    The perft count below each root move, with the root moves spread over
+    a pool of *workers* processes. Each worker has a table of *hash_mb*
+    for all the root moves it counts.
+    """
+    moves = list(Board(fen).generate_legal_int_moves())
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(hash_mb,)) as executor:
+        futures = [executor.submit(_divide_move, fen, move, depth) for move in moves]
+        return [future.result() for future in futures]
+
+
+def _timed(fn: Callable[[], int]) -> Tuple[int, float]:
+    start = time()
+    nodes = fn()
+    return nodes, time() - start
+
+
+def _nps(nodes: int, elapsed: float) -> int:
+    # a trivial depth can finish within the timer resolution
+    return round(nodes / elapsed) if elapsed > 0 else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fen', default=STARTING_FEN)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--hash', type=int, default=0, help='perft table size in MB, 0 for none')
+    parser.add_argument('--divide', action='store_true', help='count per root move in worker processes')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes for --divide')
+    parser.add_argument('--no-python-chess', action='store_true', help='skip the python-chess reference run')
+    args = parser.parse_args()
+
+    table = PerftTable(args.hash) if args.hash and not args.divide else None
+
+    def ours() -> int:
+        if not args.divide:
+            return perft(Board(args.fen), args.depth, table)
+        counts = divide(args.fen, args.depth, args.hash, args.workers)
+        for move, count in counts:
+            print(f'{move_uci(move)}: {count}')
+        return sum(count for _, count in counts)
+
+    nodes, elapsed = _timed(ours)
+    print(f'bengal        nodes {nodes} time {elapsed:.2f}s nps {_nps(nodes, elapsed)}')
+
+    if not args.no_python_chess:
+        reference, elapsed = _timed(lambda: perft_python_chess(chess.Board(args.fen), args.depth))
+        print(f'python-chess  nodes {reference} time {elapsed:.2f}s nps {_nps(reference, elapsed)}')
+        if reference != nodes:
+            raise SystemExit(f'perft mismatch: {nodes} != {reference}')
+
+
+if __name__ == '__main__':
+    main()
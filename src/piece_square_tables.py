@@ -157,4 +157,22 @@ EG_KING_W = flip_tuple(EG_KING)
 MG_TABLE_W = [MG_PAWN_W, MG_KNIGHT_W, MG_BISHOP_W, MG_ROOK_W, MG_QUEEN_W, MG_KING_W]
 EG_TABLE_W = [EG_PAWN_W, EG_KNIGHT_W, EG_BISHOP_W, EG_ROOK_W, EG_QUEEN_W, EG_KING_W]
 
-
+# p, n, b, r, q, k
+MG_VALUE = [82, 337, 365, 477, 1025, 0]
+EG_VALUE = [94, 281, 297, 512, 936, 0]
+
+# p, n, b, r, q, k
+GAME_PHASE_VALUES = [0, 1, 1, 2, 4, 0]
+
+# PST of a piece, indexed [color][piece_type][square] and signed from
+# white's point of view so the board can keep running sums of them. Material
+# comes from the material table. Index 0 of piece_type is unused.
+MG_PIECE_SQUARE = [
+    [[0] * 64] + [[-MG_TABLE[p][sq] for sq in range(64)] for p in range(6)],
+    [[0] * 64] + [[MG_TABLE_W[p][sq] for sq in range(64)] for p in range(6)],
+]
+EG_PIECE_SQUARE = [
+    [[0] * 64] + [[-EG_TABLE[p][sq] for sq in range(64)] for p in range(6)],
+    [[0] * 64] + [[EG_TABLE_W[p][sq] for sq in range(64)] for p in range(6)],
+]
+PIECE_PHASE = [0] + GAME_PHASE_VALUES
@@ -1,18 +1,43 @@
 import math
 import os
 from collections import defaultdict
+from multiprocessing.synchronize import Event
 from time import time
-from typing import List, Optional, Set, Tuple
+from typing import List, Optional, Tuple
 
 from chess.polyglot import open_reader
 from chess.syzygy import open_tablebase
 from tabulate import tabulate
 
-from .board import BoardT, Move, MoveType, popcount
-from .hueristic import EG_VALUE, MATE_VALUE, evaluate
+from .board import (
+    MAX_PLY,
+    MOVE_FLAGS,
+    MOVE_NORMAL,
+    MOVE_NULL,
+    MOVE_PROMOTION,
+    MOVE_SQUARES,
+    BoardT,
+    IntMove,
+    MoveType,
+    move_to_square,
+    move_uci,
+    popcount,
+)
+from .hueristic import EG_VALUE, MATE_VALUE, eval_cache, evaluate_static, pawn_table
+from .move_picker import MOVE_MASK, MovePicker
+from .transposition import (
+    DEFAULT_TT_SIZE_MB,
+    TT_EXACT,
+    TT_LOWER,
+    TT_UPPER,
+    TranspositionTable,
+    entry_bound,
+    entry_depth,
+    entry_move,
+)
 from .utils import logger
 
-NULL_MOVE = Move.null()
+NULL_MOVE = MOVE_NULL
 
 
 DEFAULT_BOOK_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'books/bin/M11_2.bin')
@@ -39,17 +64,31 @@ FUTILITY_MARGIN = 500
 LMR_DEPTH = 3
 
 ENDGAME_TABLES = False
+
+# history carried into the next search is divided by this
+HISTORY_DECAY = 4
 ''' TUNE '''
 
+# Mate scores are stored in the TT as distance to mate from the node rather
+# than from the root, so they stay right when probed at another ply or in a
+# later search
+MATE_BOUND = MATE_VALUE - MAX_PLY
+
 
-def wrap_gen_insert_moves(gen, initial_moves):
-    for move in initial_moves:
-        if move is not None:
-            yield move, MoveType.CUSTOM
+def score_to_tt(score: float, ply: int) -> float:
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
 
-    for move, move_type in gen:
-        if move not in initial_moves:
-            yield move, move_type
+
+def score_from_tt(score: float, ply: int) -> float:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
 
 
 class Searcher:
@@ -57,7 +96,8 @@ class Searcher:
         self,
         book_path: Optional[str] = None,
         syzgy_dir: Optional[str] = None,
-        pos_hist: Set = None,
+        tt_size_mb: int = DEFAULT_TT_SIZE_MB,
+        tt: Optional[TranspositionTable] = None,  # e.g. a table shared with lazy SMP helpers
     ):
 
         # books
@@ -80,25 +120,74 @@ class Searcher:
                 logger.warning(f'Couldnt find default tablebase dir {DEFAULT_TABLEBASE_DIR}, proceeding without')
                 self.endg_table = None
 
+        self.tt = tt if tt is not None else TranspositionTable(tt_size_mb)
+        self.new_game()
+
+        self.start = 0
+        self.max_time = DEFAULT_TIME
+        self.strict_time = False
+        # set to cut a strict time search off early, from another process
+        self.stop_event: Optional[Event] = None
+
+    def new_game(self) -> None:
+        """Forgets everything learnt from earlier searches, for a new game."""
+        self.tt.clear()
+
         # History Hueristic
-        # 64 x 64 for from,to indices for ea color
+        # 64 x 64 for from,to indices for ea color, indexed by move & MOVE_SQUARES
         self.history = {
-            True: [[0 for _ in range(64)] for _ in range(64)],
-            False: [[0 for _ in range(64)] for _ in range(64)],
+            True: [0] * 64 * 64,
+            False: [0] * 64 * 64,
         }
+        # counter moves, the quiet that last refuted a move, indexed the same way
         self.cm_hist = {
-            True: [[0 for _ in range(64)] for _ in range(64)],
-            False: [[0 for _ in range(64)] for _ in range(64)],
+            True: [0] * 64 * 64,
+            False: [0] * 64 * 64,
         }
 
-        if not pos_hist:
-            self.pos_hist = set()
+        self.pv_length = [0 for _ in range(64)]
+        self.pv_table = [[0 for _ in range(64)] for _ in range(64)]
+        self.killers = defaultdict(list)
+        # root of the last search, as (zobrist key, ply)
+        self.root = None
+
+    def _carry_over(self, board: BoardT) -> None:
+        """
+        Keeps what the last search learnt for a search from *board*: the TT
+        ages a generation, history is decayed and, when *board* is the last
+        root or follows on from it, killers and the PV are kept, moved up by
+        the plies played if the game followed the PV. The first search of a
+        game starts from the history as it is, which Lazy SMP helpers seed.
+        """
+        self.tt.new_search()
+
+        # plies played since the last root, -1 if this isn't a continuation of it
+        played = -1
+        if self.root is not None:
+            for history in self.history.values():
+                history[:] = [score // HISTORY_DECAY for score in history]
+            root_key, root_ply = self.root
+            played = board.ply() - root_ply
+            if not 0 <= played <= len(board.move_stack):
+                played = -1
+            elif (board._stack[-played].zobrist if played else board.zobrist) != root_key:
+                played = -1
+        self.root = (board.zobrist, board.ply())
+
+        line = self.pv_table[0][: self.pv_length[0]]
+        moves_played = [board.to_int_move(move) for move in board.move_stack[len(board.move_stack) - played :]]
+        if played >= 0 and moves_played == line[:played]:
+            line = line[played:]
+            killers = {ply - played: moves for ply, moves in self.killers.items() if ply >= played}
+            self.killers = defaultdict(list, killers)
         else:
-            self.pos_hist = pos_hist
+            line = []
+            self.killers = defaultdict(list)
 
-        self.start = 0
-        self.max_time = DEFAULT_TIME
-        self.strict_time = False
+        self.pv_length = [0 for _ in range(64)]
+        self.pv_table = [[0 for _ in range(64)] for _ in range(64)]
+        self.pv_table[0][: len(line)] = line
+        self.pv_length[0] = len(line)
 
     def find_move(
         self,
@@ -106,7 +195,7 @@ class Searcher:
         depth: Optional[int] = DEFAULT_DEPTH,
         max_time: Optional[float] = DEFAULT_TIME,
         strict_time: bool = False,  # whether to cut search off at max_time regardless of place
-    ) -> Move:
+    ) -> Tuple[float, List[str]]:
 
         score = -1000
         moves = []
@@ -138,6 +227,7 @@ class Searcher:
         board: BoardT,
         depth: int,
         can_null: bool = True,
+        start_depth: int = 1,
     ) -> Tuple[float, List[str]]:
         # stats
         self.nodes = 0
@@ -148,20 +238,16 @@ class Searcher:
         self.ftnodes_tried = 0
         self.dtnodes = 0
         self.dtnodes_tried = 0
+        self.seenodes = 0
         self.egnodes = 0
         self.nm = 0
         self.nbook = 0
         self.nm_tried = 0
         self.kmoves = 0
-        self.kmoves_tot = 0
-        self.kmoves_ill = 0
         self.pvs_research = 0
 
         # tt table/PV + killer/history hueristics
-        self.tt_score = {}
-        self.pv_length = [0 for _ in range(64)]
-        self.pv_table = [[0 for _ in range(64)] for _ in range(64)]
-        self.killers = defaultdict(list)
+        self._carry_over(board)
 
         # setting some params
         self.max_q_depth = 100
@@ -169,9 +255,6 @@ class Searcher:
         self.ids_depth = 0
         score = 0
 
-        # Save in position history
-        self.pos_hist.add(board._board_pieces_state())
-
         # Try to find a book move
         entry = None if not self.book_op else self.book_op.get(board)
 
@@ -187,7 +270,7 @@ class Searcher:
         #         logger.debug(f'ENDGAME (d={d}) score {score}, mv {move.uci()}')
         #         yield score, move
 
-        for d in range(1, depth + 1):
+        for d in range(start_depth, depth + 1):
             self.ids_depth = d
             t = time()
 
@@ -208,9 +291,12 @@ class Searcher:
                 'Null',
                 'TT N/Mv',
                 'TT Sz',
-                'KMv Cut/Tot/Ill',
+                'Eval Hit/Miss/Lazy',
+                'Pawn Hit/Miss',
+                'KMv Cut',
                 'Futi Pr',
                 'Delt Pr',
+                'SEE Pr',
                 'PV Research',
                 'Best',
                 'Score',
@@ -221,21 +307,29 @@ class Searcher:
                 self.qnodes,
                 f'{self.nm}/{self.nm_tried}',
                 f'{self.lnodes, self.lmoves}',
-                len(self.tt_score),
-                f'{self.kmoves}/{self.kmoves_tot}/{self.kmoves_ill}',
+                self.tt.used,
+                f'{eval_cache.hits}/{eval_cache.misses}/{eval_cache.lazy}',
+                f'{pawn_table.hits}/{pawn_table.misses}',
+                self.kmoves,
                 f'{self.ftnodes}/{self.ftnodes_tried}',
                 f'{self.dtnodes}/{self.dtnodes_tried}',
+                self.seenodes,
                 self.pvs_research,
-                self.pv_table[0][0],
+                move_uci(self.pv_table[0][0]),
                 score,
             ]
-            logger.debug(f"cur pv: {[m for m in self.pv_table[0] if m != 0]}")
+            # Principal Variation, converted from int moves for the caller
+            self.pv = [move_uci(m) for m in self.pv_line(board)]
+            logger.debug(f"cur pv: {self.pv}")
             table = tabulate([data], headers=labels, tablefmt='grid')
-            # Principal Variation
-            self.pv = [m for m in self.pv_table[0] if m != 0]
             logger.debug('\n' + table)
             yield score, self.pv
 
+    def _should_stop(self) -> bool:
+        if time() - self.start > self.max_time:
+            return True
+        return self.stop_event is not None and self.stop_event.is_set()
+
     def quiesce(
         self,
         board: BoardT,
@@ -246,10 +340,19 @@ class Searcher:
         dp: bool,  # delta prune?
     ):
         self.qnodes += 1
-        stand_pat = evaluate(board, ply)
-        if self.strict_time and self.qnodes % NODES_PER_TIME_CHECK == 0 and time() - self.start > self.max_time:
-            return stand_pat
+        if self.strict_time and self.qnodes % NODES_PER_TIME_CHECK == 0 and self._should_stop():
+            return evaluate_static(board)
+
+        # the static eval doesn't look for mate, in check the evasions are
+        # generated up front and searched below
+        in_check = bool(board.attack_info().checkers)
+        if in_check:
+            moves = list(board.generate_legal_int_moves())
+            if not moves:
+                # + ply prioritizes shorter checkmates
+                return -MATE_VALUE + ply
 
+        stand_pat = evaluate_static(board, alpha, beta)
         if stand_pat >= beta:
             return stand_pat
 
@@ -260,28 +363,55 @@ class Searcher:
         if depth == self.max_q_depth:
             return alpha
 
-        for move, move_type in board.generate_sorted_non_qs_moves():
+        if not in_check:
+            captures = board.generate_qs_captures()
+            captures.sort(reverse=True)
+            moves = [scored & MOVE_MASK for scored in captures]
+
+        for move in moves:
+            # Captures that lose material in the exchange can't raise alpha, unless they check
+            if not in_check and board.see(move) < 0 and not board.gives_check_int(move):
+                self.seenodes += 1
+                continue
             # Delta pruning on capture
-            if dp and move_type == MoveType.CAPTURE:
-                pieceval = EG_VALUE[board.piece_type_at(move.to_square) - 1]
+            if dp and not in_check and move & MOVE_FLAGS == MOVE_NORMAL and not board.gives_check_int(move):
+                pieceval = EG_VALUE[board.piece_type_at(move_to_square(move)) - 1]
                 self.dtnodes_tried += 1
                 if stand_pat + (pieceval + DELTA_PRUNE_SAFETY_MARGIN) < alpha:
                     self.dtnodes += 1
                     continue
-            board.push(move)
+            board.make_move(move)
             score = -self.quiesce(board, depth + 1, -beta, -alpha, ply + 1, dp)
-            board.pop()
+            board.unmake_move()
             alpha = max(alpha, score)
 
             if score >= beta:
                 return score
         return alpha
 
-    def update_pv(self, move: Move, ply: int) -> None:
+    def pv_line(self, board: BoardT) -> List[IntMove]:
+        # root PV, continued from the TT where a hash cutoff cut it short
+        line = self.pv_table[0][: self.pv_length[0]]
+        for move in line:
+            board.make_move(move)
+        while len(line) < self.ids_depth:
+            tt_slot = self.tt.probe(board.zobrist)
+            if tt_slot < 0:
+                break
+            move = entry_move(self.tt.entries[tt_slot])
+            if not board.is_legal_int(move):
+                break
+            board.make_move(move)
+            line.append(move)
+        for _ in line:
+            board.unmake_move()
+        return line
+
+    def update_pv(self, move: IntMove, ply: int) -> None:
         if move == NULL_MOVE:
             return
 
-        self.pv_table[ply][ply] = move.uci()
+        self.pv_table[ply][ply] = move
         # copy moves from deeper ply into current plys line
         next_ply = ply + 1
         while next_ply < self.pv_length[ply + 1]:
@@ -304,9 +434,9 @@ class Searcher:
 
         self.nodes += 1
 
-        z_hash = board.__hash__()
+        z_hash = board.zobrist
         self.pv_length[ply] = ply
-        in_check = board.is_check()
+        in_check = bool(board.attack_info().checkers)
         root_node = ply == 0
         pv_node = alpha != beta - 1
         # So we know whether this is a best score node
@@ -326,70 +456,47 @@ class Searcher:
             score = self.quiesce(board, 0, alpha, beta, ply, dp=False)
             return score
 
-        # Don't repeat positions
-        if not root_node and board._board_pieces_state() in self.pos_hist:
+        # Don't repeat positions, in the game or along the search path
+        if not root_node and board.has_repeated():
             return 0
 
-        # Start to generate moves
-        # Moves are added FILO (First in Last out)
-        # Although even last moves will go before any board generated moves
-        moves_first = []
-        # Killers
-        if self.killers[ply]:
-            if len(self.killers[ply]) >= 2:
-                kmove_2 = self.killers[ply][-2]
-                if board.is_legal(kmove_2):
-                    self.kmoves_tot += 1
-                    moves_first.append(kmove_2)
-                else:
-                    self.kmoves_ill += 1
-
-            kmove = self.killers[ply][-1]
-            if board.is_legal(kmove):
-                self.kmoves_tot += 1
-                moves_first.append(kmove)
-            else:
-                self.kmoves_ill += 1
+        # The side to move can repeat with one reversible move, so this node is worth at least a draw
+        if not root_node and alpha < 0 and board.has_game_cycle():
+            alpha = 0
+            if alpha >= beta:
+                return alpha
 
         # scores
-        entry = self.tt_score.get(z_hash)
-        tt_move = None
-        if entry and entry[0] >= depth:
-            self.lnodes += 1
-            flag = entry[1]
-            tt_score = entry[2]
-            tt_move = entry[3]
-            if flag == 0:  # exact
-                if tt_move != NULL_MOVE:
-                    moves_first.append(tt_move)
-
-            elif flag == 1:  # lower bound
-                if tt_score > alpha:
-                    alpha = tt_score
-                    # wrap gen does not handle nulls right now, so omit them
-                    if update_pv and tt_move != NULL_MOVE:
-                        # update_pv handles null move lower bounds
-                        self.update_pv(tt_move, ply)
-                        # add hash moves to move gen
-                        moves_first.append(tt_move)
-
-            elif flag == 2:  # upper bound
-                beta = min(beta, tt_score)
-
-            if alpha >= beta:  # prune
-                return tt_score
+        tt_slot = self.tt.probe(z_hash)
+        tt_move = NULL_MOVE
+        if tt_slot >= 0:
+            entry = self.tt.entries[tt_slot]
+            # the stored move orders the moves whatever depth it was searched to
+            tt_move = entry_move(entry)
+            if entry_depth(entry) >= depth:
+                self.lnodes += 1
+                flag = entry_bound(entry)
+                tt_score = score_from_tt(self.tt.scores[tt_slot], ply)
+
+                if flag == TT_LOWER:
+                    if tt_score > alpha:
+                        alpha = tt_score
+                        if update_pv and tt_move != NULL_MOVE:
+                            # the line below the hash move is unknown, don't copy a stale one
+                            self.pv_length[ply + 1] = ply + 1
+                            self.update_pv(tt_move, ply)
+
+                elif flag == TT_UPPER:
+                    beta = min(beta, tt_score)
+
+                if alpha >= beta:  # prune
+                    return tt_score
 
         # if we have been through at least depth=1 of IDS
-        # try PV moves first
+        # try the last PV move first at the root
         dist_fr_root = self.ids_depth - depth
-        # if there is an entry for this depth already
-        if self.pv_table[0][dist_fr_root] != 0:
-            if dist_fr_root == 0:  # depth = 2 root node
-                moves_first.append(Move.from_uci(self.pv_table[0][0]))
-            else:
-                # last move on the board was the last depths PV move
-                if board.move_stack[-1] == self.pv_table[0][dist_fr_root - 1]:
-                    moves_first.append(Move.from_uci(self.pv_table[0][dist_fr_root]))
+        if dist_fr_root == 0 and self.pv_table[0][0] != 0:
+            tt_move = self.pv_table[0][0]
 
         # Null Move Pruning
         # If we are in zugzwang, this is mistake
@@ -403,15 +510,15 @@ class Searcher:
             and popcount(board.occupied_co[board.turn] & ~board.pawns) > 1
         ):
             self.nm_tried += 1
-            board.push(NULL_MOVE)
+            board.make_move(NULL_MOVE)
             score = -self.pvs(board, depth - 1 - NMP_REDUC, -beta, -beta + 1, False, ply + 1, update_pv=False)
-            board.pop()
+            board.unmake_move()
 
             if score >= beta:
                 self.nm += 1
 
                 if ply > 0:
-                    self.tt_score[z_hash] = (depth, 1, score, NULL_MOVE)  # lower bound
+                    self.tt.store(z_hash, depth, TT_LOWER, score_to_tt(score, ply), NULL_MOVE)
                     return score
 
         # Did not prune, do a normal search
@@ -420,22 +527,26 @@ class Searcher:
         found_pv = False
         best = -float('inf')
         best_move = NULL_MOVE
-        move_gen = board.generate_sorted_pseudo_legal_moves(self.history[board.turn], self.cm_hist[board.turn])
-        move_gen = board.get_legal_generator(wrap_gen_insert_moves(move_gen, moves_first))
+        killers = self.killers[ply][:-3:-1]
+        last_move = board.peek_made()
+        counter_move = self.cm_hist[board.turn][last_move & MOVE_SQUARES] if last_move else NULL_MOVE
+        move_gen = MovePicker(board, self.history[board.turn], tt_move, killers, counter_move)
+        check_info = board.attack_info().check_info()
         # moves other than caps, checks, could be history heuristic good
         other_moves_tried = 0
         lmr_depth_term = math.sqrt(depth - 1)
 
         for move, move_type in move_gen:
 
-            if self.strict_time and self.nodes % NODES_PER_TIME_CHECK == 0 and time() - self.start > self.max_time:
+            if self.strict_time and self.nodes % NODES_PER_TIME_CHECK == 0 and self._should_stop():
                 return best
 
             found = True
-            board.push(move)
+            gives_check = move_type is MoveType.CHECK or check_info.gives_check(move)
+            board.make_move(move)
             other_moves_tried += 1 if move_type is MoveType.OTHER else 0
             # # Futlity Pruning
-            # if depth <= 2 and self.ids_depth > 3 and not in_check and not pv_node:
+            # if depth <= 2 and self.ids_depth > 3 and not in_check and not gives_check and not pv_node:
             #     eval = evaluate(board)
             #     self.ftnodes_tried += 1
             #     if eval - FUTILITY_MARGIN >= beta:
@@ -453,8 +564,8 @@ class Searcher:
                     score = -self.pvs(board, depth - 1, -beta, -alpha, can_null, ply + 1, update_pv=True)
             else:
                 reduction = 0
-                # Late Move Reductions
-                if depth >= LMR_DEPTH and not in_check and not root_node:
+                # Late Move Reductions, checks are searched to full depth
+                if depth >= LMR_DEPTH and not in_check and not gives_check and not root_node:
                     reduction = int(0.5 * (lmr_depth_term + math.sqrt(other_moves_tried)))
                     reduction = min(depth - 1, reduction)  # at most current depth - 1
 
@@ -462,7 +573,7 @@ class Searcher:
 
                 if score > alpha:
                     score = -self.pvs(board, depth - 1, -beta, -alpha, can_null, ply + 1, update_pv=True)
-            board.pop()
+            board.unmake_move()
 
             if score > best:
                 best = score
@@ -476,45 +587,43 @@ class Searcher:
 
                 if alpha >= beta:
                     # countermoves
-                    # if move_type is not MoveType.CAPTURE:
-                    #     last = board.move_stack[-1]
-                    #     self.cm_hist[board.turn][last.from_square][last.to_square] = move
-                    if move in self.killers[ply]:
+                    if last_move and not board.is_capture_int(move) and move & MOVE_FLAGS != MOVE_PROMOTION:
+                        self.cm_hist[board.turn][last_move & MOVE_SQUARES] = move
+                    if move in killers:
                         self.kmoves += 1
                     break
 
                 # save in history
                 if move_type is MoveType.CAPTURE:
-                    self.history[board.turn][best_move.from_square][best_move.to_square] += 2**depth
+                    self.history[board.turn][best_move & MOVE_SQUARES] += 2**depth
 
         if found:
 
             # TT Management
             flag = -1
             if best >= beta:  # failed high, lower bound
-                flag = 1
+                flag = TT_LOWER
                 # killers = non-captures that are beta-cutoffs
                 if (
                     best > beta
-                    and not board.is_capture(best_move)
-                    and best_move is not NULL_MOVE
-                    and not best_move.promotion
+                    and best_move != NULL_MOVE
+                    and not board.is_capture_int(best_move)
+                    and best_move & MOVE_FLAGS != MOVE_PROMOTION
                 ):
                     self.killers[ply].append(best_move)
 
             if best <= alpha_orig:  # failed low, upper bound
-                flag = 2
+                flag = TT_UPPER
 
             if alpha_orig < best and best < beta:  # exact, PV node
-                flag = 0
+                flag = TT_EXACT
 
-            # if no entry or this depth is less or eq to existing
-            if not self.tt_score.get(z_hash) or depth <= self.tt_score[z_hash][1]:
-                self.tt_score[z_hash] = (depth, flag, best, best_move)
+            # replacement is decided by the table
+            self.tt.store(z_hash, depth, flag, score_to_tt(best, ply), best_move)
 
             return best
         else:  # no moves
-            if board.is_check():
+            if in_check:
                 # + ply prioritizes shorter checkmates
                 return -MATE_VALUE + ply
             else:
@@ -0,0 +1,159 @@
+from multiprocessing import shared_memory
+from typing import Optional
+
+from .board import IntMove
+
+DEFAULT_TT_SIZE_MB = 16
+
+# bound types
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+# Each slot is two 64 bit words, a packed entry and the score as a double:
+#   bits  0-15  int move
+#   bits 16-23  depth
+#   bits 24-25  bound
+#   bits 26-31  age (search generation)
+#   bits 32-63  upper half of the zobrist key, for verification, xor-ed
+#               with the score's bits (see score_check) so a slot whose two
+#               words were written by different stores doesn't verify
+# The low bits of the key pick the bucket, which holds a depth-preferred slot
+# followed by an always-replace slot. All entry words come first in the
+# buffer, then all scores.
+SLOT_BYTES = 16
+BUCKET_SLOTS = 2
+
+MAX_DEPTH = 0xFF
+AGE_MASK = 0x3F
+
+
+# Accessors for an entry word, see TranspositionTable.probe
+def entry_move(entry: int) -> IntMove:
+    return entry & 0xFFFF
+
+
+def entry_depth(entry: int) -> int:
+    return entry >> 16 & MAX_DEPTH
+
+
+def entry_bound(entry: int) -> int:
+    return entry >> 24 & 0x3
+
+
+def entry_age(entry: int) -> int:
+    return entry >> 26 & AGE_MASK
+
+
+def score_check(score_bits: int) -> int:
+    # the 64 bits of a stored score folded to 32
+    return (score_bits ^ score_bits >> 32) & 0xFFFFFFFF
+
+
+class TranspositionTable:
+    """
+    Fixed size transposition table backed by one flat buffer, so memory
+    stays constant however long the engine runs and a store allocates nothing.
+
+    With *shared* the buffer is a :class:`multiprocessing.shared_memory.SharedMemory`
+    block that other processes attach to by passing its :data:`name`, for
+    lazy SMP. There are no locks: a slot torn by two processes storing at
+    once fails verification and reads as a miss. Only the process that
+    created a shared table clears it or starts a new search on it.
+
+    Entries outlive the search that stored them: :meth:`new_search` bumps
+    the generation instead of clearing, and entries of older generations
+    are still probed but are the first to be replaced.
+    """
+
+    def __init__(self, size_mb: int = DEFAULT_TT_SIZE_MB, shared: bool = False, name: Optional[str] = None):
+        # largest power of two bucket count that fits the requested size
+        n_buckets = 1
+        while n_buckets * 2 * BUCKET_SLOTS * SLOT_BYTES <= size_mb * 1024 * 1024:
+            n_buckets *= 2
+        self.n_slots = n_buckets * BUCKET_SLOTS
+        self.bucket_mask = n_buckets - 1
+        self.generation = 0
+        self.used = 0
+
+        size = self.n_slots * SLOT_BYTES
+        self.owner = name is None
+        if name is not None:
+            self.shm = shared_memory.SharedMemory(name=name)
+        elif shared:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = None
+        buffer = memoryview(bytearray(size)) if self.shm is None else self.shm.buf[:size]
+        self.name = None if self.shm is None else self.shm.name
+
+        half = self.n_slots * 8
+        self.entries = buffer[:half].cast('Q')
+        self.scores = buffer[half:].cast('d')
+        # the same memory as scores, read as bits for score_check
+        self.score_bits = buffer[half:].cast('Q')
+        self._buffer = buffer
+        if self.owner:
+            self.clear()
+
+    def clear(self) -> None:
+        if self.owner:
+            self._buffer[:] = bytes(len(self._buffer))
+        self.used = 0
+
+    def new_search(self) -> None:
+        if self.owner:
+            self.generation = (self.generation + 1) & AGE_MASK
+
+    def close(self) -> None:
+        """Releases a shared table's memory, removing it once the creator closes."""
+        if self.shm is None:
+            return
+        for view in [self.entries, self.scores, self.score_bits, self._buffer]:
+            view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+    def probe(self, key: int) -> int:
+        """
+        Returns the slot holding key, or -1 if there is none. The entry word
+        and score are then read from entries[slot] and scores[slot].
+        """
+        index = (key & self.bucket_mask) * BUCKET_SLOTS
+        check = key >> 32
+        entries = self.entries
+        entry = entries[index]
+        if entry and entry >> 32 ^ score_check(self.score_bits[index]) == check:
+            return index
+        entry = entries[index + 1]
+        if entry and entry >> 32 ^ score_check(self.score_bits[index + 1]) == check:
+            return index + 1
+        return -1
+
+    def store(self, key: int, depth: int, bound: int, score: float, move: IntMove) -> None:
+        check = key >> 32
+        index = (key & self.bucket_mask) * BUCKET_SLOTS
+        entries = self.entries
+        old = entries[index]
+        # Keep the deeper entry of this search in the first slot, anything else goes to the second
+        if (
+            old
+            and old >> 32 ^ score_check(self.score_bits[index]) != check
+            and entry_depth(old) > depth
+            and entry_age(old) == self.generation
+        ):
+            index += 1
+            old = entries[index]
+
+        if not old:
+            self.used += 1
+        self.scores[index] = score
+        entries[index] = (
+            (check ^ score_check(self.score_bits[index])) << 32
+            | self.generation << 26
+            | bound << 24
+            | min(depth, MAX_DEPTH) << 16
+            | move
+        )
@@ -0,0 +1,186 @@
+import random
+
+import pytest
+
+from .. import (
+    A1,
+    A8,
+    BB_FILES,
+    BB_RANK_2,
+    BB_RANK_3,
+    BB_RANK_6,
+    BB_RANK_7,
+    BB_RANKS,
+    BLACK,
+    COLORS,
+    E1,
+    E8,
+    H1,
+    H8,
+    KING,
+    PAWN,
+    ROOK,
+    WHITE,
+    Board,
+    Piece,
+    popcount,
+    scan_reversed,
+    shift_down,
+    shift_down_left,
+    shift_down_right,
+    shift_left,
+    shift_right,
+    shift_up,
+    shift_up_left,
+    shift_up_right,
+    square_file,
+    square_rank,
+)
+from ..src.hueristic import LAZY_MARGIN, RANK_SCALE, _evaluate, _pawn_score
+
+# pawn terms well above or below the rest of the evaluation
+PAWN_FENS = [
+    '4k3/PPP5/8/8/8/8/8/4K3 w - - 0 1',
+    '4k3/PP6/2P5/8/8/8/8/4K3 w - - 0 1',
+    '4k3/PPP5/8/8/8/8/8/4K3 b - - 0 1',
+    'rnbqkbnr/8/pppppppp/8/8/PPPPPPPP/8/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/1ppppp2/1PP1PP2/8/8/8/8/R3K2R b KQkq - 0 1',
+]
+
+
+def random_positions(rng, n):
+    positions = []
+    while len(positions) < n:
+        board = Board()
+        for _ in range(rng.randrange(80)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        positions.append(board)
+    return positions
+
+
+def random_pawn_positions(rng, n):
+    # kings, a rook each so no specialized endgame applies, and up to 8 pawns a side
+    positions = []
+    for _ in range(n):
+        board = Board(None)
+        squares = rng.sample(range(8, 56), 16)
+        for color in COLORS:
+            for square in squares[8 * color:8 * color + rng.randrange(9)]:
+                board.set_piece_at(square, Piece(PAWN, color))
+        board.set_piece_at(E1 if rng.random() < 0.5 else A1, Piece(KING, WHITE))
+        board.set_piece_at(H1, Piece(ROOK, WHITE))
+        board.set_piece_at(E8 if rng.random() < 0.5 else A8, Piece(KING, BLACK))
+        board.set_piece_at(H8, Piece(ROOK, BLACK))
+        board.turn = rng.choice(COLORS)
+        positions.append(board)
+    return positions
+
+
+def windows(rng, score):
+    # a narrow window around the full score and random ones up to twice the margin away
+    yield score - 1, score + 1
+    for _ in range(20):
+        alpha = score + rng.uniform(-2, 2) * LAZY_MARGIN
+        yield alpha, alpha + rng.choice([1, 10, 100])
+
+
+def assert_lazy_sides(board, rng):
+    full, exact = _evaluate(board)
+    assert exact
+    for alpha, beta in windows(rng, full):
+        score, exact = _evaluate(board, alpha, beta)
+        if exact:
+            assert score == full
+        elif score >= beta:
+            # a lazy score is a bound on the full one
+            assert full >= score, f'{board.fen()} ({alpha}, {beta})'
+        else:
+            assert full <= score, f'{board.fen()} ({alpha}, {beta})'
+        assert (score >= beta) == (full >= beta), f'{board.fen()} ({alpha}, {beta})'
+        assert (score <= alpha) == (full <= alpha), f'{board.fen()} ({alpha}, {beta})'
+
+
+@pytest.mark.parametrize('fen', PAWN_FENS)
+def test_lazy_window_pawn_fens(fen):
+    assert_lazy_sides(Board(fen), random.Random(fen))
+
+
+def test_lazy_window_random_games():
+    rng = random.Random(0)
+    for board in random_positions(rng, 200):
+        assert_lazy_sides(board, rng)
+
+
+def test_lazy_window_random_pawn_structures():
+    rng = random.Random(1)
+    for board in random_pawn_positions(rng, 300):
+        assert_lazy_sides(board, rng)
+
+
+def pawn_score_per_pawn(board, c):
+    # frozen copy of the per-pawn loop _pawn_score replaced, which it must match exactly
+    if board.turn:
+        back = shift_down
+        block_ranks = BB_RANK_2 | BB_RANK_3
+        pawn_att_squares = lambda pawns: shift_up_left(pawns) | shift_up_right(pawns)  # noqa: E731
+    else:
+        back = shift_up
+        block_ranks = BB_RANK_7 | BB_RANK_6
+        pawn_att_squares = lambda pawns: shift_down_left(pawns) | shift_down_right(pawns)  # noqa: E731
+
+    pawns = board.occupied_co[c] & board.pawns
+    their_pawns = board.occupied_co[not c] & board.pawns
+    their_pawns_pushed = back(their_pawns)
+    supp_pawns = pawn_att_squares(pawns) & pawns
+    doubled_pawns = (back(pawns) & pawns) & ~supp_pawns
+
+    score = 0
+    for pawn_sq in scan_reversed(pawns):
+        pawn = 1 << pawn_sq
+        file = BB_FILES[square_file(pawn_sq)]
+        files_adj = shift_left(file) | shift_right(file)
+        blocked = their_pawns_pushed & pawn & block_ranks
+        opposed = their_pawns & file
+        isolated = files_adj & pawns
+        supported = supp_pawns & pawn
+        rank = square_rank(pawn_sq)
+        rank_bonus_idx = rank if c else 7 - rank
+        phalanx = (files_adj & BB_RANKS[rank]) & pawns
+        doubled = doubled_pawns & pawn
+
+        is_doubled = popcount(doubled) > 0
+        is_iso = popcount(isolated) == 0
+        if is_doubled and is_iso:
+            score -= 11
+        elif is_iso:
+            score -= 5
+        if is_doubled:
+            score -= 11
+
+        is_supp = popcount(supported) > 0
+        is_phal = popcount(phalanx) > 0
+        is_opp = popcount(opposed) > 0
+        if is_supp or is_phal:
+            if rank_bonus_idx not in (0, 7):
+                score += RANK_SCALE[rank_bonus_idx] * (2 + int(is_phal) - int(is_opp)) + 11 * int(is_supp)
+
+        if popcount(blocked) > 0:
+            if rank_bonus_idx == 2:
+                score -= 11
+            elif rank_bonus_idx == 3:
+                score -= 3
+    return score
+
+
+def test_pawn_score_matches_per_pawn_loop():
+    rng = random.Random(2)
+    boards = random_pawn_positions(rng, 2000) + random_positions(rng, 200)
+    boards += [Board(fen) for fen in PAWN_FENS]
+    for board in boards:
+        for turn in COLORS:
+            board.turn = turn
+            for c in COLORS:
+                assert _pawn_score(board, c) == pawn_score_per_pawn(board, c), (board.fen(), c)
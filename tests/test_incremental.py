@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from .. import (
+    COLORS,
+    MOVE_CASTLING,
+    MOVE_EN_PASSANT,
+    MOVE_FLAGS,
+    MOVE_NULL,
+    MOVE_PROMOTION,
+    PAWN,
+    PIECE_TYPES,
+    POLYGLOT_PIECE_KEYS,
+    Board,
+    SQUARES,
+    Move,
+    Piece,
+    move_uci,
+    piece_code,
+    popcount,
+    scan_reversed,
+)
+
+# castling both ways, en passant, promotions and under-promotions come up within a few plies
+FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+    '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+    'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+    'n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1',
+]
+
+PLAYOUTS = 20
+PLIES = 60
+
+
+def pawn_key(board):
+    key = 0
+    for color in COLORS:
+        for square in scan_reversed(board.pieces_mask(PAWN, color)):
+            key ^= POLYGLOT_PIECE_KEYS[color][PAWN][square]
+    return key
+
+
+def material_key(board):
+    key = 0
+    for color in COLORS:
+        for piece_type in PIECE_TYPES:
+            key += popcount(board.pieces_mask(piece_type, color)) << (piece_code(piece_type, color) << 2)
+    return key
+
+
+def pieces(board):
+    # the piece on each square by the bitboards
+    squares = [None] * 64
+    for color in COLORS:
+        for piece_type in PIECE_TYPES:
+            for square in scan_reversed(board.pieces_mask(piece_type, color)):
+                squares[square] = Piece(piece_type, color)
+    return squares
+
+
+def state(board):
+    return board.zobrist, board.pawn_key, board.material_key, bytes(board.mailbox)
+
+
+def assert_consistent(board):
+    # the incremental keys against the same keys worked out from scratch,
+    # the key hashes an en passant square whether or not the capture is legal
+    fen = board.fen(en_passant='fen')
+    assert board.zobrist == board._zobrist_hash(), fen
+    assert board.zobrist == Board(fen).zobrist, fen
+    assert board.pawn_key == pawn_key(board), fen
+    assert board.material_key == material_key(board), fen
+
+    # the mailbox, and piece_at which reads it, against the bitboards
+    expected = pieces(board)
+    codes = [piece_code(piece.piece_type, piece.color) if piece else 0 for piece in expected]
+    assert board.mailbox == bytearray(codes), fen
+    for square in SQUARES:
+        assert board.piece_at(square) == expected[square], (fen, square)
+
+def random_playout(board, rng, make):
+    # plays random legal moves and null moves, checking after every move and
+    # again after every undo, and returns the move kinds played
+    kinds = set()
+    undo = []
+    for _ in range(PLIES):
+        moves = list(board.generate_legal_int_moves())
+        if not moves:
+            break
+        move = rng.choice(moves)
+        if not board.is_check() and rng.random() < 0.1:
+            move = MOVE_NULL
+        kinds.add(move & MOVE_FLAGS if move else 'null')
+
+        undo.append(state(board))
+        if make:
+            board.make_move(move)
+        else:
+            board.push(Move.from_uci(move_uci(move)) if move else Move.null())
+        assert_consistent(board)
+
+    while undo:
+        if make:
+            board.unmake_move()
+        else:
+            board.pop()
+        assert state(board) == undo.pop()
+        assert_consistent(board)
+    return kinds
+
+
+@pytest.mark.parametrize('make', [False, True], ids=['push', 'make'])
+def test_incremental_state(make):
+    rng = random.Random(0)
+    kinds = set()
+    for fen in FENS:
+        for _ in range(PLAYOUTS):
+            board = Board(fen)
+            kinds |= random_playout(board, rng, make)
+    assert kinds >= {MOVE_CASTLING, MOVE_EN_PASSANT, MOVE_PROMOTION, 'null'}
@@ -1,26 +1,13 @@
 from chess import Board as ChessBoard
 from chess import BoardT as ChessBoardT
 from .. import Board as CustomBoard
-from .. import BoardT as CustomBoardT
+from ..src.perft import PerftTable, divide, main
+from ..src.perft import perft as bulk_perft
 
+import pytest
 from tqdm import tqdm
 
 
-
-def perft_test(depth: int, board: CustomBoardT) -> int:
-    if depth >= 1:
-        count = 0
-        move_gen = board.get_legal_generator(board.generate_sorted_pseudo_legal_moves())
-        for move, move_type in move_gen:
-            board.push(move)
-            count += perft_test(depth - 1, board)
-            board.pop()
-
-        return count
-    else:
-        return 1
-
-
 def perft(depth: int, board: ChessBoardT) -> int:
     if depth >= 1:
         count = 0
@@ -40,12 +27,12 @@ def test_perft(m8in3_fens, m8in2_fens, perft_fen_data):
 
     for fen in tqdm(m8in3_fens, desc = 'Mate in 3 perft'):
         actual = perft(3, ChessBoard(fen))
-        pred = perft_test(3, CustomBoard(fen))
+        pred = bulk_perft(CustomBoard(fen), 3)
         assert actual == pred
     
     for fen in tqdm(m8in2_fens, desc = 'Mate in 2 perft'):
         actual = perft(3, ChessBoard(fen))
-        pred = perft_test(3, CustomBoard(fen))
+        pred = bulk_perft(CustomBoard(fen), 3)
         assert actual == pred
     
     d = sorted(perft_fen_data, key=lambda x: x['depth'])
@@ -53,6 +40,51 @@ def test_perft(m8in3_fens, m8in2_fens, perft_fen_data):
         depth = test['depth']
         fen = test['fen']
         actual = perft(depth, ChessBoard(fen))
-        pred = perft_test(depth, CustomBoard(fen))
-        assert actual == pred    
+        pred = bulk_perft(CustomBoard(fen), depth)
+        assert actual == pred
+
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+KIWIPETE_FEN = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+
+
+@pytest.mark.parametrize('fen, depth, nodes', [
+    (STARTING_FEN, 3, 8902),
+    (STARTING_FEN, 4, 197281),
+    (KIWIPETE_FEN, 2, 2039),
+    (KIWIPETE_FEN, 3, 97862),
+])
+def test_perft_table(fen, depth, nodes):
+    assert bulk_perft(CustomBoard(fen), depth) == nodes
+
+    # the same table over shallower runs, whose counts must not be taken for this depth,
+    # and then a repeat, answered from what the first run stored
+    table = PerftTable(1)
+    for shallower in range(2, depth):
+        bulk_perft(CustomBoard(fen), shallower, table)
+    assert bulk_perft(CustomBoard(fen), depth, table) == nodes
+    assert bulk_perft(CustomBoard(fen), depth, table) == nodes
+
+    # a single slot, every store replaces the last one
+    assert bulk_perft(CustomBoard(fen), depth, PerftTable(0)) == nodes
+
+
+@pytest.mark.parametrize('hash_mb', [0, 1])
+def test_divide(hash_mb):
+    counts = divide(KIWIPETE_FEN, 3, hash_mb, workers=2)
+    assert len(counts) == 48
+    assert sum(count for _, count in counts) == 97862
+
+    board = CustomBoard(KIWIPETE_FEN)
+    for move, count in counts:
+        board.make_move(move)
+        assert bulk_perft(board, 2) == count
+        board.unmake_move()
+
 
+@pytest.mark.parametrize('args', [[], ['--hash', '1'], ['--divide', '--hash', '1', '--workers', '2']])
+def test_perft_cli(args, monkeypatch, capsys):
+    # exits with an error on a mismatch with python-chess
+    monkeypatch.setattr('sys.argv', ['perft', '--fen', KIWIPETE_FEN, '--depth', '2'] + args)
+    main()
+    assert 'bengal        nodes 2039 ' in capsys.readouterr().out
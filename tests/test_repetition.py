@@ -0,0 +1,96 @@
+from .. import MOVE_NULL, Board, Move
+
+SHUFFLE = ['g1f3', 'g8f6', 'f3g1', 'f6g8']
+
+
+def make_uci(board, uci):
+    board.make_move(board.to_int_move(Move.from_uci(uci)))
+
+
+def test_repetition_pushed():
+    board = Board()
+    for uci in SHUFFLE[:-1]:
+        board.push_uci(uci)
+        assert not board.has_repeated()
+    board.push_uci(SHUFFLE[-1])
+    assert board.has_repeated()
+
+
+def test_repetition_made():
+    board = Board()
+    for uci in SHUFFLE[:-1]:
+        make_uci(board, uci)
+        assert not board.has_repeated()
+    make_uci(board, SHUFFLE[-1])
+    assert board.has_repeated()
+
+    board.unmake_move()
+    assert not board.has_repeated()
+
+
+def test_repetition_across_push_and_make():
+    # the earlier position is in the game, the repeat on the search path
+    board = Board()
+    for uci in SHUFFLE[:2]:
+        board.push_uci(uci)
+    for uci in SHUFFLE[2:]:
+        make_uci(board, uci)
+    assert board.has_repeated()
+
+
+def test_threefold_shuffle():
+    board = Board()
+    for uci in SHUFFLE * 2:
+        board.push_uci(uci)
+    assert board.has_repeated()
+    assert board.is_repetition(3)
+
+    for uci in SHUFFLE * 2:
+        make_uci(board, uci)
+    assert board.has_repeated()
+
+
+def test_no_repetition_across_null_move():
+    # the null moves bring back the start position, but not by moves played
+    board = Board()
+    make_uci(board, 'g1f3')
+    board.make_move(MOVE_NULL)
+    make_uci(board, 'f3g1')
+    board.make_move(MOVE_NULL)
+    assert board.zobrist == Board().zobrist
+    assert not board.has_repeated()
+
+    board = Board()
+    board.make_move(MOVE_NULL)
+    board.make_move(MOVE_NULL)
+    assert board.zobrist == Board().zobrist
+    assert not board.has_repeated()
+
+
+# The black rook goes d8-c8-c5-d5 while the white knight goes out and back
+# by a different route, so only the start position is a move away
+ROOK_DETOUR = ['g1f3', 'd8c8', 'f3d4', 'c8c5', 'd4e2', 'c5d5', 'e2g1']
+
+
+def test_game_cycle_reachable():
+    board = Board()
+    for uci in SHUFFLE[:-1]:
+        assert not board.has_game_cycle()
+        make_uci(board, uci)
+    # Ng8 repeats the start position
+    assert board.has_game_cycle()
+
+    board = Board('3r3k/8/8/8/8/8/8/4K1N1 w - - 0 1')
+    for uci in ROOK_DETOUR:
+        assert not board.has_game_cycle()
+        make_uci(board, uci)
+    # Rd8 repeats the start position
+    assert board.has_game_cycle()
+
+
+def test_game_cycle_blocked():
+    # the same detour with a pawn on d7, Rd8 is not possible
+    board = Board('3r3k/3p4/8/8/8/8/8/4K1N1 w - - 0 1')
+    for uci in ROOK_DETOUR:
+        make_uci(board, uci)
+        assert not board.has_game_cycle()
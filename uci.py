@@ -2,15 +2,20 @@ import sys
 import time
 from concurrent.futures import ThreadPoolExecutor
 from threading import Event
+from typing import Optional
 
+from src.bench import BENCH_DEPTH, bench
 from src.board import STARTING_BOARD_FEN, Board, BoardT
+from src.lazy_smp import LazySMP, deepest
 from src.searcher_pvs import Searcher
+from src.transposition import DEFAULT_TT_SIZE_MB, TranspositionTable
 from src.utils import logger, set_logger_level
 
 
 set_logger_level('ERROR')
 
 DEFAULT_MAX_DEPTH = 100
+MAX_THREADS = 64
 
 
 def go_loop(
@@ -21,6 +26,7 @@ def go_loop(
     strict_time: bool = False,
     max_depth: int = 100,
     debug: bool = False,
+    smp: Optional[LazySMP] = None,
 ):
 
     if debug:
@@ -48,6 +54,10 @@ def go_loop(
         info_str = " ".join(f"{k} {v}" for k, v in fields.items())
         print(f"info {info_str}",flush=True)
 
+        # helpers join once the first iteration has set the table generation
+        if smp is not None and depth == 1:
+            smp.start(board, max_depth)
+
         # Have a move (depth > 1), break conditions below
         if depth > 1:
             # Depth limiting case
@@ -67,6 +77,14 @@ def go_loop(
     # go-loop before we got stop_event. Unfortunately we currently don't know if
     # we are in "go infinite" since it's simply translated to "go depth 100".
 
+    # a helper may have completed a deeper iteration than the main search
+    if smp is not None:
+        helper_best = deepest(smp.stop())
+        if helper_best is not None and helper_best[0] > depth:
+            helper_depth, score, pv = helper_best
+            if debug:
+                print(f"info string helper depth {helper_depth} score {score}", flush=True)
+
     print("bestmove", pv[0] if pv else "(none)",flush=True)
 
 
@@ -75,9 +93,22 @@ def main():
     Partially implemented UCI protocol
     """
     debug = True
-    searcher = Searcher()
+    hash_mb = DEFAULT_TT_SIZE_MB
+    threads = 1
+    # one table for the session, in shared memory once there are helper processes
+    tt = TranspositionTable(hash_mb)
+    searcher = Searcher(tt=tt)
+    smp = None
+
+    def resize(new_hash_mb: int, new_threads: int):
+        nonlocal hash_mb, threads, tt, searcher, smp
+        tt.close()
+        hash_mb, threads = new_hash_mb, new_threads
+        tt = TranspositionTable(hash_mb, shared=threads > 1)
+        searcher = Searcher(tt=tt)
+        smp = LazySMP(threads - 1, tt, hash_mb) if threads > 1 else None
+
     board = Board()
-    pos_hist = set()
     N_MOVES = 100
     with ThreadPoolExecutor() as exec:
         # Noop future to get started
@@ -104,8 +135,30 @@ def main():
                 elif args[0] == 'uci':
                     print('id name Bengal')
                     print('id author erosten')
+                    print(f'option name Hash type spin default {DEFAULT_TT_SIZE_MB} min 1 max 1024')
+                    print(f'option name Threads type spin default 1 min 1 max {MAX_THREADS}')
                     print('uciok')
 
+                elif args[0] == 'setoption':
+                    # setoption name <id> value <x>
+                    # not while a search is using the table
+                    if go_future.running():
+                        pass
+                    elif len(args) >= 5 and args[2] == 'Hash':
+                        resize(max(1, int(args[4])), threads)
+                    elif len(args) >= 5 and args[2] == 'Threads':
+                        resize(hash_mb, min(max(1, int(args[4])), MAX_THREADS))
+
+                elif args[0] == 'bench':
+                    # bench [depth], not while a search is running
+                    if not go_future.running():
+                        bench(int(args[1]) if len(args) > 1 else BENCH_DEPTH)
+
+                elif args[0] == 'ucinewgame':
+                    # the searcher otherwise carries its table, history and killers from move to move
+                    if not go_future.running():
+                        searcher.new_game()
+
                 elif args[0] == 'isready':
                     print('readyok')
 
@@ -118,30 +171,23 @@ def main():
                 elif args[0] == "position":
                     if args[1] == 'startpos':
                         board = Board(STARTING_BOARD_FEN)
-                        pos_hist.clear()
-                        pos_hist.add(board._board_pieces_state())
                         N_MOVES = 100
 
+                        # the game moves stay on the board's stack for repetition detection
                         for move in args[3:]:
                             board.push_uci(move)
-                            pos_hist.add(board._board_pieces_state())
                             N_MOVES -= 1
 
                     elif args[1] == 'fen':
                         fen = ' '.join(args[2:8])
                         board = Board(fen=fen)
-                        pos_hist.clear()
-                        pos_hist.add(board._board_pieces_state())
                         N_MOVES = 100
 
                         if len(args) > 8:
                             for move in args[9:]:
                                 board.push_uci(move)
-                                pos_hist.add(board._board_pieces_state())
                                 N_MOVES -= 1
 
-                    searcher = Searcher(pos_hist=pos_hist)
-
                 elif args[0] == "go":
                     max_depth = 100
                     strict = False
@@ -175,7 +221,8 @@ def main():
                         ttm, 
                         strict, 
                         max_depth, 
-                        debug
+                        debug,
+                        smp,
                     )
 
                     # Make sure we get informed if the job fails
@@ -191,6 +238,12 @@ def main():
                     go_future.result()
                 break
 
+    # frees the shared memory of a lazy SMP table
+    tt.close()
+
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ['bench']:
+        bench(int(sys.argv[2]) if len(sys.argv) > 2 else BENCH_DEPTH)
+    else:
+        main()